@@ -55,7 +55,7 @@ def dashboard_home(request: Request, db: Session = Depends(get_db)):
         if raw:
             try:
                 engine_summary = json.loads(raw)
-            except Exception:
+            except json.JSONDecodeError:
                 engine_summary = None
 
     underwriting_mode = get_config(db, "underwriting_mode", "AUTO")
@@ -103,7 +103,6 @@ def merchant_detail(merchant_id: str, request: Request, db: Session = Depends(ge
     if not risk_score:
         raise HTTPException(status_code=404, detail="No underwriting record found")
     
-    # Deserialize financial_offer from JSON if present
     risk_score_dict = {
         "id": risk_score.id,
         "merchant_id": risk_score.merchant_id,
@@ -114,16 +113,8 @@ def merchant_detail(merchant_id: str, request: Request, db: Session = Depends(ge
         "offer_status": risk_score.offer_status,
         "whatsapp_status": getattr(risk_score, "whatsapp_status", "NOT_SENT"),
         "decision_source": getattr(risk_score, "decision_source", "AGENT"),
-        "financial_offer": None
+        "financial_offer": risk_score.financial_offer or None,  # JSON column → dict
     }
-    
-    if risk_score.financial_offer:
-        try:
-            offer_data = json.loads(risk_score.financial_offer)
-            risk_score_dict["financial_offer"] = offer_data
-        except json.JSONDecodeError:
-            logger.warning(f"Failed to deserialize financial_offer for merchant {merchant_id}")
-            risk_score_dict["financial_offer"] = None
 
     # All merchants for dropdown selector
     all_merchants = db.query(Merchant).all()
@@ -279,8 +270,8 @@ def update_mobile_inline(merchant_id: str, request: Request, mobile_number: str
     logger.info(f"[Inline] Mobile updated for {merchant_id}: {raw}")
 
     # Wipe stored fingerprint so engine re-processes this merchant on next cycle
-    from app.services.config_service import set_config as _set_config
-    _set_config(db, f"fp_{merchant_id}", "")  # empty = will be treated as changed
+    from app.services.fingerprint_service import delete_fingerprint
+    delete_fingerprint(db, merchant_id)  # missing = will be treated as changed
     logger.info(f"[Inline] Fingerprint wiped for {merchant_id} — engine will re-detect")
 
     # If merchant already has an approved decision, send WA immediately to the new number
@@ -301,13 +292,7 @@ def update_mobile_inline(merchant_id: str, request: Request, mobile_number: str
             to_number = normalize_wa_number(dest)
 
             if to_number:
-                fo_dict = {}
-                if risk_score.financial_offer:
-                    try:
-                        import json as _json
-                        fo_dict = _json.loads(risk_score.financial_offer)
-                    except Exception:
-                        fo_dict = {}
+                fo_dict = risk_score.financial_offer or {}
 
                 base_url = os.getenv("APP_BASE_URL", "http://localhost:8000")
                 offer_link = (
@@ -324,6 +309,7 @@ def update_mobile_inline(merchant_id: str, request: Request, mobile_number: str
                     explanation=risk_score.explanation or "",
                     financial_offer=fo_dict,
                     secure_offer_link=offer_link,
+                    force=True,  # admin just (re)entered this number — always send
                 )
                 wa_sent = (
                     result.get("status") in ("queued", "sent", "delivered", "accepted")
@@ -415,13 +401,8 @@ def send_offer_whatsapp(merchant_id: str, db: Session = Depends(get_db)):
         else ""
     )
 
-    # Parse financial_offer to dict for message formatter
-    fo_dict = {}
-    if risk_score.financial_offer:
-        try:
-            fo_dict = json.loads(risk_score.financial_offer)
-        except Exception:
-            fo_dict = {}
+    # Financial offer for the message formatter (JSON column → dict)
+    fo_dict = risk_score.financial_offer or {}
 
     wa_service = WhatsAppService()
     result = wa_service.send_underwriting_result(
@@ -434,6 +415,7 @@ def send_offer_whatsapp(merchant_id: str, db: Session = Depends(get_db)):
         explanation=risk_score.explanation or "",
         financial_offer=fo_dict,
         secure_offer_link=offer_link,
+        force=True,  # explicit admin send — always goes out
     )
 
     # Update whatsapp_status
@@ -6,7 +6,6 @@ No authentication required.
 """
 
 import os
-import json
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Request
@@ -36,26 +35,15 @@ def view_merchant_offer(
     Accessed via /offer/{secure_token}
     Optional ?status=accepted|rejected query param shows confirmation banner.
     """
-    merchant = db.query(Merchant).filter(
-        Merchant.secure_token == secure_token
-    ).first()
+    merchant, risk_score = _merchant_with_latest_score(db, secure_token)
 
     if not merchant:
         raise HTTPException(status_code=404, detail="Offer not found. Please check the link and try again.")
 
-    risk_score = db.query(RiskScore).filter(
-        RiskScore.merchant_id == merchant.merchant_id
-    ).order_by(RiskScore.id.desc()).first()
-
     if not risk_score:
         raise HTTPException(status_code=404, detail="No offer available. Please contact support.")
 
-    financial_offer = {}
-    if risk_score.financial_offer:
-        try:
-            financial_offer = json.loads(risk_score.financial_offer)
-        except Exception as e:
-            logger.warning(f"Failed to parse financial_offer for {merchant.merchant_id}: {e}")
+    financial_offer = risk_score.financial_offer or {}  # JSON column → dict
 
     return templates.TemplateResponse(
         "public_offer.html",
@@ -80,14 +68,10 @@ def view_merchant_offer(
 @router.post("/{secure_token}/accept")
 def accept_offer(secure_token: str, db: Session = Depends(get_db)):
     """Record merchant's acceptance of offer and redirect back with status banner."""
-    merchant = db.query(Merchant).filter(Merchant.secure_token == secure_token).first()
+    merchant, risk_score = _merchant_with_latest_score(db, secure_token)
     if not merchant:
         raise HTTPException(status_code=404, detail="Merchant not found")
 
-    risk_score = db.query(RiskScore).filter(
-        RiskScore.merchant_id == merchant.merchant_id
-    ).order_by(RiskScore.id.desc()).first()
-
     if risk_score:
         risk_score.offer_status = "ACCEPTED"
         db.commit()
@@ -107,14 +91,10 @@ def accept_offer(secure_token: str, db: Session = Depends(get_db)):
 @router.post("/{secure_token}/reject")
 def reject_offer(secure_token: str, db: Session = Depends(get_db)):
     """Record merchant's rejection of offer and redirect back with status banner."""
-    merchant = db.query(Merchant).filter(Merchant.secure_token == secure_token).first()
+    merchant, risk_score = _merchant_with_latest_score(db, secure_token)
     if not merchant:
         raise HTTPException(status_code=404, detail="Merchant not found")
 
-    risk_score = db.query(RiskScore).filter(
-        RiskScore.merchant_id == merchant.merchant_id
-    ).order_by(RiskScore.id.desc()).first()
-
     if risk_score:
         risk_score.offer_status = "REJECTED"
         db.commit()
@@ -124,9 +104,26 @@ def reject_offer(secure_token: str, db: Session = Depends(get_db)):
 
 
 # ---------------------------------------------------------------------------
-# Internal helper
+# Internal helpers
 # ---------------------------------------------------------------------------
 
+def _merchant_with_latest_score(db: Session, secure_token: str):
+    """
+    (merchant, latest RiskScore) for a token in one query.
+
+    The risk score is None when the merchant has none yet; both are None
+    for an unknown token. secure_token is a unique indexed column.
+    """
+    row = (
+        db.query(Merchant, RiskScore)
+        .outerjoin(RiskScore, RiskScore.merchant_id == Merchant.merchant_id)
+        .filter(Merchant.secure_token == secure_token)
+        .order_by(RiskScore.id.desc())
+        .first()
+    )
+    return row if row is not None else (None, None)
+
+
 def _send_confirmation_whatsapp(db, merchant, action: str, risk_score) -> None:
     """
     Send a brief confirmation WhatsApp after merchant accepts (non-blocking).
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, Query
-from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.schemas.merchant_schema import MerchantInput
 from app.schemas.decision_schema import UnderwritingDecision
@@ -8,10 +8,13 @@ from app.db.session import get_db
 
 router = APIRouter(prefix="/api", tags=["underwriting"])
 
+MAX_BATCH_SIZE = 50
+
 
 @router.post("/underwrite", response_model=UnderwritingDecision)
 async def underwrite(
     merchant: MerchantInput,
+    background_tasks: BackgroundTasks,
     whatsapp_number: Optional[str] = Query(
         None,
         description="Optional WhatsApp number to send result (format: whatsapp:+91XXXXXXXXXX)"
@@ -29,10 +32,12 @@ async def underwrite(
     with risk score, approval status, and optional financial offers.
     
     Optionally sends result via WhatsApp if whatsapp_number is provided.
-    WhatsApp delivery failures do not affect API response.
+    The send runs as a background task after the response is returned, so
+    Twilio latency and delivery failures never affect the API response.
     
     Args:
         merchant: MerchantInput containing merchant financial metrics
+        background_tasks: FastAPI background tasks (injected) — runs the WhatsApp send
         whatsapp_number: Optional WhatsApp number to receive result message
         mode: Optional financial offer mode ('credit', 'insurance', or None for both)
         db: SQLAlchemy database session (injected via dependency)
@@ -41,4 +46,42 @@ async def underwrite(
         UnderwritingResult: Underwriting result with risk assessment, decision, and financial offer
     """
     orchestrator = Orchestrator()
-    return orchestrator.process_underwriting(merchant, db, whatsapp_number, mode)
+    return orchestrator.process_underwriting(
+        merchant, db, whatsapp_number, mode, background_tasks=background_tasks
+    )
+
+
+@router.post("/underwrite/batch", response_model=List[UnderwritingDecision])
+def underwrite_batch(
+    merchants: List[MerchantInput],
+    mode: Optional[str] = Query(
+        None,
+        description="Financial offer mode: 'credit', 'insurance', or None for both"
+    ),
+    db: Session = Depends(get_db)
+) -> List[UnderwritingDecision]:
+    """
+    Underwrite up to MAX_BATCH_SIZE merchants in one request.
+
+    Same decision path as /underwrite, but the explanations come from one
+    Claude call per ClaudeUnderwritingAgent.BATCH_SIZE merchants and the
+    merchants share one database commit. No WhatsApp is sent. The batch is
+    all-or-nothing: if any merchant fails, nothing is saved.
+
+    A plain def: the Claude and SQLite calls block, so FastAPI runs this in
+    its threadpool instead of stalling the event loop for the whole batch.
+
+    Args:
+        merchants: List of MerchantInput
+        mode: Optional financial offer mode ('credit', 'insurance', or None for both)
+        db: SQLAlchemy database session (injected via dependency)
+
+    Returns:
+        List of UnderwritingResult, in the same order as ``merchants``
+    """
+    if len(merchants) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_BATCH_SIZE} merchants per batch (got {len(merchants)})",
+        )
+    return Orchestrator().process_underwriting_batch(merchants, db, mode)
@@ -1,3 +1,7 @@
+from uuid import uuid4
+
+from sqlalchemy import bindparam, insert, inspect, select, text, update
+
 from app.db.base import Base
 from app.db.session import engine, SessionLocal
 
@@ -5,6 +9,7 @@ from app.db.session import engine, SessionLocal
 from app.models.merchant import Merchant
 from app.models.risk_score import RiskScore
 from app.models.system_config import SystemConfig
+from app.models.merchant_fingerprint import MerchantFingerprint
 
 # Fixed 10-merchant dataset for evaluator demo
 # Tier distribution: Tier 1 × 6, Tier 2 × 2, Tier 3 REJECTED × 2 (M004, M006)
@@ -147,41 +152,117 @@ SAMPLE_MERCHANTS = [
 def init_db():
     """Initialize database by creating all tables, then seed sample merchants."""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
     _seed_merchants()
 
 
+def _add_missing_columns():
+    """
+    Additive schema upgrades for databases created before a column or index
+    existed (create_all never alters existing tables).
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("merchants")}
+    with engine.begin() as conn:
+        if "updated_at" not in columns:
+            conn.execute(text("ALTER TABLE merchants ADD COLUMN updated_at DATETIME"))
+            conn.execute(text("UPDATE merchants SET updated_at = CURRENT_TIMESTAMP"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_merchants_updated_at ON merchants (updated_at)"
+            ))
+        if "secure_token" not in columns:
+            conn.execute(text("ALTER TABLE merchants ADD COLUMN secure_token CHAR(36)"))
+            _backfill_secure_tokens(conn)
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_merchants_secure_token ON merchants (secure_token)"
+            ))
+        # Composite (merchant_id, id DESC) index supersedes the single-column one
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_risk_scores_merchant_id_id_desc "
+            "ON risk_scores (merchant_id, id DESC)"
+        ))
+        conn.execute(text("DROP INDEX IF EXISTS ix_risk_scores_merchant_id"))
+
+
+def _backfill_secure_tokens(conn, chunk_size: int = 1000):
+    """
+    Give every merchant without a secure_token a fresh UUID.
+
+    Reads ids only and writes each chunk as one executemany UPDATE, rather
+    than loading and flushing full Merchant rows one at a time.
+    """
+    merchants = Merchant.__table__
+    ids = conn.execute(
+        select(merchants.c.id).where(merchants.c.secure_token.is_(None))
+    ).scalars().all()
+    stmt = (
+        update(merchants)
+        .where(merchants.c.id == bindparam("row_id"))
+        .values(secure_token=bindparam("token"))
+    )
+    for start in range(0, len(ids), chunk_size):
+        conn.execute(stmt, [
+            {"row_id": row_id, "token": str(uuid4())}
+            for row_id in ids[start:start + chunk_size]
+        ])
+
+
+def _seed_fields(data: dict) -> dict:
+    """Column values synced from a SAMPLE_MERCHANTS entry (mobile_number excluded)."""
+    return {
+        "category":               data["category"],
+        "monthly_revenue":        data["monthly_revenue"],
+        "credit_score":           data["credit_score"],
+        "years_in_business":      data["years_in_business"],
+        "existing_loans":         data["existing_loans"],
+        "past_defaults":          data["past_defaults"],
+        "chargeback_rate":        data["chargeback_rate"],
+        "refund_rate":            data["refund_rate"],
+        "gmv":                    data["monthly_revenue"] * 1.2,
+        "avg_order_value":        data["avg_order_value"],
+        "unique_customer_count":  data["unique_customer_count"],
+        "customer_return_rate":   data["customer_return_rate"],
+        "coupon_redemption_rate": data["coupon_redemption_rate"],
+        "seasonality_index":      data["seasonality_index"],
+        "deal_exclusivity_rate":  data["deal_exclusivity_rate"],
+        "return_and_refund_rate": data["return_and_refund_rate"],
+        "monthly_gmv_12m":        data["monthly_gmv_12m"],
+    }
+
+
 def _seed_merchants():
-    """Insert or update the 10 fixed sample merchants."""
+    """
+    Insert or update the 10 fixed sample merchants.
+
+    Existing rows are loaded in one query and synced through the ORM, so only
+    changed fields are written (and updated_at only moves when something did).
+    Missing rows go in as one executemany INSERT with client-side tokens.
+    """
     db = SessionLocal()
     try:
+        seed_ids = [data["merchant_id"] for data in SAMPLE_MERCHANTS]
+        existing = {
+            merchant.merchant_id: merchant
+            for merchant in db.query(Merchant).filter(Merchant.merchant_id.in_(seed_ids))
+        }
+
+        new_rows = []
         for data in SAMPLE_MERCHANTS:
-            merchant = db.query(Merchant).filter_by(merchant_id=data["merchant_id"]).first()
-            if not merchant:
-                merchant = Merchant(merchant_id=data["merchant_id"])
-                db.add(merchant)
-
-            # Always sync fields so profile updates propagate on restart
-            merchant.category               = data["category"]
-            merchant.monthly_revenue        = data["monthly_revenue"]
-            merchant.credit_score           = data["credit_score"]
-            merchant.years_in_business      = data["years_in_business"]
-            merchant.existing_loans         = data["existing_loans"]
-            merchant.past_defaults          = data["past_defaults"]
-            merchant.chargeback_rate        = data["chargeback_rate"]
-            merchant.refund_rate            = data["refund_rate"]
-            merchant.gmv                    = data["monthly_revenue"] * 1.2
-            merchant.avg_order_value        = data["avg_order_value"]
-            merchant.unique_customer_count  = data["unique_customer_count"]
-            merchant.customer_return_rate   = data["customer_return_rate"]
-            merchant.coupon_redemption_rate = data["coupon_redemption_rate"]
-            merchant.seasonality_index      = data["seasonality_index"]
-            merchant.deal_exclusivity_rate  = data["deal_exclusivity_rate"]
-            merchant.return_and_refund_rate = data["return_and_refund_rate"]
-            merchant.monthly_gmv_12m        = data["monthly_gmv_12m"]
-            # Keep mobile_number if already set by admin
-            if merchant.mobile_number is None:
-                merchant.mobile_number = None
+            fields = _seed_fields(data)
+            merchant = existing.get(data["merchant_id"])
+            if merchant is None:
+                new_rows.append({
+                    **fields,
+                    "merchant_id": data["merchant_id"],
+                    "secure_token": str(uuid4()),
+                })
+                continue
+            # Always sync fields so profile updates propagate on restart;
+            # mobile_number is left alone so an admin-set number survives
+            for name, value in fields.items():
+                setattr(merchant, name, value)
 
+        if new_rows:
+            db.execute(insert(Merchant), new_rows)
         db.commit()
     finally:
         db.close()
@@ -8,16 +8,25 @@ os.makedirs(_DB_DIR, exist_ok=True)
 DATABASE_URL = f"sqlite:///{_DB_DIR}/underwriting.db"
 
 # Create SQLAlchemy engine
+# Pool is sized for the engine's burst of sessions (batch run + orchestrator +
+# background monitor) so checkouts don't serialise on the default 5+10 pool.
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},  # Required for SQLite
+    pool_size=20,
+    max_overflow=10,
+    pool_recycle=60,     # seconds — recycle idle connections
+    pool_pre_ping=True,  # validate connections on checkout
     echo=False  # Set to True for SQL logging
 )
 
 # Create session factory
+# expire_on_commit=False keeps loaded attributes valid after per-iteration
+# commits instead of forcing a reload on next access.
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
+    expire_on_commit=False,
     bind=engine
 )
 
@@ -0,0 +1,171 @@
+"""
+Batch risk scoring — RiskEngine.evaluate_risk's score and hard-reject flag
+for many merchants in one vectorized pass over a NumPy struct-of-arrays.
+
+Kept out of risk_engine so the per-merchant scoring path never imports
+NumPy; import this module only where merchants are scored in bulk. Needs
+numpy (requirements-dev.txt); numba, when installed, compiles the row loop.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from app.engines.risk_engine import RiskEngine
+from app.schemas.merchant_schema import MerchantInput
+
+try:  # optional — compiles evaluate_risk_batch's row loop to native code
+    from numba import config as _numba_config, njit
+except ImportError:
+    njit = None
+
+# Hard-reject thresholds, copied from RiskEngine into module globals because
+# numba freezes globals into the compiled kernel as constants — the reject
+# test compiles to compares against immediates.
+_MIN_CREDIT_SCORE = RiskEngine.MIN_CREDIT_SCORE
+_MAX_PAST_DEFAULTS = RiskEngine.MAX_PAST_DEFAULTS
+
+# Column layout for evaluate_risk_batch — one field per scoring input
+# (struct-of-arrays). GMV growth enters as the two half-year averages
+# RiskEngine.evaluate_risk derives from monthly_gmv_12m, NaN when it awards
+# no growth.
+MERCHANT_SCORE_DTYPE = np.dtype([
+    ("credit_score", np.int32),
+    ("monthly_revenue", np.float64),
+    ("years_in_business", np.int32),
+    ("existing_loans", np.int32),
+    ("past_defaults", np.int32),
+    ("customer_return_rate", np.float64),
+    ("deal_exclusivity_rate", np.float64),
+    ("gmv_h1_avg", np.float64),
+    ("gmv_h2_avg", np.float64),
+    ("refund_rate", np.float64),
+    ("chargeback_rate", np.float64),
+    ("return_and_refund_rate", np.float64),
+    ("seasonality_index", np.float64),
+])
+
+
+def _score_rows(credit, revenue, years, loans, defaults, crr, der,
+                gmv_h1, gmv_h2, refund, chargeback, return_refund, seasonality):
+    """
+    RiskEngine.evaluate_risk's arithmetic as one loop over
+    MERCHANT_SCORE_DTYPE columns, for numba to compile. Mirrors the scalar
+    float operations exactly (no fastmath — reassociation could move a score
+    across an integer boundary).
+    """
+    n = credit.shape[0]
+    scores = np.zeros(n, np.int64)
+    auto_reject = np.zeros(n, np.bool_)
+    for i in range(n):
+        if credit[i] < _MIN_CREDIT_SCORE or defaults[i] > _MAX_PAST_DEFAULTS:
+            auto_reject[i] = True
+            continue
+        score = (credit[i] / 850.0) * 40
+        score += (min(revenue[i], 100_000.0) / 100_000) * 25
+        score += min(years[i], 5) * 2.4
+        score += crr[i] * 8.0
+        score += der[i] * 5.0
+        if not np.isnan(gmv_h1[i]):
+            gmv_yoy_pct = ((gmv_h2[i] - gmv_h1[i]) / gmv_h1[i]) * 100
+            score += max(0.0, min(10.0, gmv_yoy_pct * 0.5))
+        score -= loans[i] * 3
+        score -= defaults[i] * 10
+        if refund[i] > 0.30:
+            score -= 20
+        elif refund[i] > 0.15:
+            score -= 10
+        if chargeback[i] > 0.10:
+            score -= 15
+        elif chargeback[i] > 0.05:
+            score -= 8
+        if return_refund[i] > 0.10:
+            score -= 8
+        if seasonality[i] > 2.0:
+            score -= 5
+        scores[i] = max(0, min(100, int(score)))
+    return scores, auto_reject
+
+
+# cache=True keeps the compiled kernel on disk, so only the first process pays
+# the compile. Without numba (or with NUMBA_DISABLE_JIT=1) the NumPy path runs.
+_score_rows_native = (
+    njit(cache=True)(_score_rows)
+    if njit is not None and not _numba_config.DISABLE_JIT
+    else None
+)
+
+
+def to_score_array(merchants: List[MerchantInput]) -> np.ndarray:
+    """Pack merchants into a MERCHANT_SCORE_DTYPE array for evaluate_risk_batch."""
+    rows = []
+    for m in merchants:
+        h1_avg = h2_avg = np.nan
+        gmv_list = m.monthly_gmv_12m or []
+        if len(gmv_list) >= 12:
+            h1 = sum(gmv_list[:6]) / 6
+            if h1 > 0:
+                h1_avg, h2_avg = h1, sum(gmv_list[6:]) / 6
+        rows.append((
+            m.credit_score, m.monthly_revenue, m.years_in_business,
+            m.existing_loans, m.past_defaults,
+            m.customer_return_rate or 0.0, m.deal_exclusivity_rate or 0.0,
+            h1_avg, h2_avg,
+            m.refund_rate or 0.0, m.chargeback_rate or 0.0,
+            m.return_and_refund_rate or 0.0, m.seasonality_index or 1.0,
+        ))
+    return np.array(rows, dtype=MERCHANT_SCORE_DTYPE)
+
+
+def evaluate_risk_batch(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score many merchants in one vectorized pass (a compiled loop when
+    numba is installed).
+
+    Same rules and the same float operations, in the same order, as
+    RiskEngine.evaluate_risk, so each score is identical to the scalar
+    result — but only the numbers: no breakdown, benchmark or reject reason.
+    Use RiskEngine.evaluate_risk when those are needed.
+
+    Args:
+        arr: MERCHANT_SCORE_DTYPE array (see to_score_array)
+
+    Returns:
+        (scores, auto_reject): int64 scores 0–100 (0 when rejected)
+        and a boolean hard-reject mask
+    """
+    if _score_rows_native is not None:
+        return _score_rows_native(*(arr[name] for name in MERCHANT_SCORE_DTYPE.names))
+    return _evaluate_risk_batch_numpy(arr)
+
+
+def _evaluate_risk_batch_numpy(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """evaluate_risk_batch as NumPy ufuncs — used when numba is unavailable."""
+    auto_reject = (
+        (arr["credit_score"] < _MIN_CREDIT_SCORE)
+        | (arr["past_defaults"] > _MAX_PAST_DEFAULTS)
+    )
+
+    score = (arr["credit_score"] / 850.0) * 40
+    score = score + (np.minimum(arr["monthly_revenue"], 100_000) / 100_000) * 25
+    score = score + np.minimum(arr["years_in_business"], 5) * 2.4
+    score = score + arr["customer_return_rate"] * 8.0
+    score = score + arr["deal_exclusivity_rate"] * 5.0
+
+    # NaN (no growth term) propagates through and is left out by the where
+    h1_avg = arr["gmv_h1_avg"]
+    gmv_yoy_pct = ((arr["gmv_h2_avg"] - h1_avg) / h1_avg) * 100
+    score = np.where(np.isnan(gmv_yoy_pct), score, score + np.clip(gmv_yoy_pct * 0.5, 0, 10))
+
+    score = score - arr["existing_loans"] * 3
+    score = score - arr["past_defaults"] * 10
+    rr = arr["refund_rate"]
+    score = score - np.where(rr > 0.30, 20, np.where(rr > 0.15, 10, 0))
+    cb = arr["chargeback_rate"]
+    score = score - np.where(cb > 0.10, 15, np.where(cb > 0.05, 8, 0))
+    score = score - np.where(arr["return_and_refund_rate"] > 0.10, 8, 0)
+    score = score - np.where(arr["seasonality_index"] > 2.0, 5, 0)
+
+    scores = np.clip(np.trunc(score), 0, 100).astype(np.int64)
+    scores[auto_reject] = 0
+    return scores, auto_reject
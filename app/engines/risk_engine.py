@@ -75,7 +75,7 @@ class RiskEngine:
                 "gmv_yoy_pct": None,
             }
 
-        if merchant.past_defaults >= 3:
+        if merchant.past_defaults > RiskEngine.MAX_PAST_DEFAULTS:
             return {
                 "auto_reject": True,
                 "reason": (
@@ -25,6 +25,13 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     init_db()
 
+    # Drop fingerprints from an older hashing scheme before the monitor reads them
+    try:
+        from app.services import monitor_service
+        monitor_service.migrate_fingerprints()
+    except Exception as e:
+        logger.warning(f"[Startup] Fingerprint migration failed: {e}")
+
     # Restore ALWAYS_ON monitor if it was running before restart
     try:
         from app.db.session import SessionLocal
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, CHAR
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, JSON, CHAR, DateTime
 from app.db.base import Base
 from uuid import uuid4
 
@@ -38,3 +39,6 @@ class Merchant(Base):
     seasonality_index = Column(Float, default=1.0, nullable=True)  # Peak/trough ratio
     deal_exclusivity_rate = Column(Float, default=0.0, nullable=True)  # % exclusive deals (0-1)
     return_and_refund_rate = Column(Float, default=0.0, nullable=True)  # % returns/refunds (0-1)
+
+    # Bumped on every ORM update — lets the monitor shortlist changed merchants
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True, nullable=True)
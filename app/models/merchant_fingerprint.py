@@ -0,0 +1,17 @@
+"""
+MerchantFingerprint model — last fingerprint the monitor assessed per merchant.
+
+One row per merchant, keyed by merchant_id, so lookups and upserts hit the
+primary key instead of prefix-scanning system_config for fp_* keys.
+fp holds the raw 8-byte xxh3 digest, not its hex encoding.
+"""
+
+from sqlalchemy import Column, LargeBinary, String
+from app.db.base import Base
+
+
+class MerchantFingerprint(Base):
+    __tablename__ = "merchant_fingerprints"
+
+    merchant_id = Column(String, primary_key=True)
+    fp = Column(LargeBinary(8), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Index, desc
 from app.db.base import Base
 
 
@@ -10,14 +10,20 @@ class RiskScore(Base):
     Tracks offer acceptance status for dashboard simulation.
     """
     __tablename__ = "risk_scores"
+    # Latest score per merchant (WHERE merchant_id = ? ORDER BY id DESC LIMIT 1)
+    # is a single index seek; the merchant_id prefix also serves plain lookups.
+    __table_args__ = (
+        Index("ix_risk_scores_merchant_id_id_desc", "merchant_id", desc("id")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    merchant_id = Column(String, ForeignKey("merchants.merchant_id"), nullable=False, index=True)
+    merchant_id = Column(String, ForeignKey("merchants.merchant_id"), nullable=False)
     risk_score = Column(Integer, nullable=False)
     risk_tier = Column(String, nullable=False)
     decision = Column(String, nullable=False)
     explanation = Column(String, nullable=False)
-    financial_offer = Column(Text, nullable=True)  # JSON-serialized FinancialOffer (optional)
+    # FinancialOffer as a dict, (de)serialized by SQLAlchemy; SQL NULL when absent
+    financial_offer = Column(JSON(none_as_null=True), nullable=True)
     offer_status = Column(String, default="PENDING", nullable=False)  # PENDING | ACCEPTED | REJECTED
     whatsapp_status = Column(String, default="NOT_SENT", nullable=True)  # NOT_SENT | SENT | FAILED
     decision_source = Column(String, default="AGENT", nullable=True)   # AGENT | ADMIN
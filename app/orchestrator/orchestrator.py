@@ -1,6 +1,9 @@
+import asyncio
 import os
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
+from anthropic import Anthropic
+from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 from app.engines.risk_engine import RiskEngine
 from app.engines.decision_engine import DecisionEngine
@@ -10,6 +13,7 @@ from app.schemas.decision_schema import UnderwritingDecision
 from app.services.merchant_service import MerchantService
 from app.services.application_service import RiskScoreService
 from app.services.underwriting_agent import ClaudeUnderwritingAgent
+from app.services.explanation_queue import enqueue_explanation
 from app.services.whatsapp_service import WhatsAppService, normalize_wa_number
 from app.services.config_service import get_config
 from app.models.risk_score import RiskScore
@@ -28,13 +32,24 @@ class Orchestrator:
     - WhatsApp message delivery of results
     - Data persistence and audit trail
     """
+
+    def __init__(self, anthropic_client: Optional[Anthropic] = None):
+        """
+        Args:
+            anthropic_client: Claude client for explanations; None uses the
+                shared client for ANTHROPIC_API_KEY. Queued (deferred)
+                explanations always use the shared client.
+        """
+        self.anthropic_client = anthropic_client
     
-    @staticmethod
     def process_underwriting(
+        self,
         merchant: MerchantInput,
         db: Session,
         whatsapp_number: Optional[str] = None,
-        mode: Optional[str] = None
+        mode: Optional[str] = None,
+        defer_explanation: bool = False,
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> UnderwritingDecision:
         """
         Process merchant underwriting request with AI-generated explanations and financial offers.
@@ -55,6 +70,10 @@ class Orchestrator:
             db: SQLAlchemy database session
             whatsapp_number: Optional WhatsApp number to send result (format: whatsapp:+91XXXXXXXXXX)
             mode: Optional mode for financial offer ("credit", "insurance", None for both)
+            defer_explanation: If True, step 5 uses the deterministic fallback text and the
+                Claude call is queued (explanation_queue) to overwrite the saved record later
+            background_tasks: If given, step 8 is scheduled on it (the WhatsApp send and its
+                whatsapp_status write happen after the response) instead of run inline
             
         Returns:
             UnderwritingResult: Structured underwriting result with AI explanation and financial offer
@@ -62,42 +81,17 @@ class Orchestrator:
         # Step 1: Save merchant to database
         MerchantService.create_merchant(db, merchant)
         
-        # Step 2: Evaluate risk with hard rules and weighted scoring
-        risk_result = RiskEngine.evaluate_risk(merchant)
-        
-        # Step 3: Evaluate decision based on risk result
-        risk_tier, decision, _ = DecisionEngine.evaluate(risk_result)
-        
-        # Step 4: Calculate financial offer based on mode
-        financial_offer = OfferEngine.calculate_financial_offer(
-            risk_tier=risk_tier,
-            merchant_data=merchant.dict(),
-            mode=mode
-        )
-        
-        # Step 5: Generate Claude AI explanation (with automatic fallback)
-        ai_explanation = ClaudeUnderwritingAgent.generate_explanation(
-            merchant_data=merchant.dict(),
-            risk_score=risk_result["score"],
-            risk_tier=risk_tier,
-            decision=decision,
-            category_benchmark=risk_result.get("category_benchmark", {}),
-            gmv_yoy_pct=risk_result.get("gmv_yoy_pct"),
-            score_breakdown=risk_result.get("score_breakdown", {}),
-        )
-        
-        # Step 6: Construct UnderwritingResult with AI explanation and financial offer
-        underwriting_decision = UnderwritingDecision(
-            merchant_id=merchant.merchant_id,
-            risk_score=risk_result["score"],
-            risk_tier=risk_tier,
-            decision=decision,
-            explanation=ai_explanation,
-            financial_offer=financial_offer
-        )
+        # Steps 2–6: score, decide, price the offer and explain
+        underwriting_decision, explain_job = self._evaluate(merchant, mode, defer_explanation)
+        risk_tier = underwriting_decision.risk_tier
+        decision = underwriting_decision.decision
+        financial_offer = underwriting_decision.financial_offer
+        ai_explanation = underwriting_decision.explanation
         
         # Step 7: Save risk result to database
-        RiskScoreService.create_risk_record(db, underwriting_decision)
+        saved_risk = RiskScoreService.create_risk_record(db, underwriting_decision)
+        if explain_job is not None:
+            enqueue_explanation(saved_risk.id, **explain_job)
         
         # Step 8: Send WhatsApp notification (non-blocking, doesn't affect API response)
         # Skip if underwriting_mode is MANUAL — admin will send manually via dashboard
@@ -136,30 +130,23 @@ class Orchestrator:
                     # Serialize financial_offer to plain dict for message formatter
                     fo_dict = financial_offer.dict() if financial_offer and hasattr(financial_offer, "dict") else {}
 
-                    whatsapp_service = WhatsAppService()
-                    result = whatsapp_service.send_underwriting_result(
+                    send_kwargs = dict(
                         to_number=send_to,
                         merchant_id=merchant.merchant_id,
                         merchant_name=getattr(merchant, "business_name", "") or merchant.merchant_id,
                         risk_tier=risk_tier,
                         decision=decision,
-                        risk_score=risk_result["score"],
+                        risk_score=underwriting_decision.risk_score,
                         explanation=ai_explanation,
                         financial_offer=fo_dict,
                         secure_offer_link=offer_link,
                     )
-                    # Update whatsapp_status on the saved risk record
-                    saved_record = db.query(RiskScore).filter(
-                        RiskScore.merchant_id == merchant.merchant_id
-                    ).order_by(RiskScore.id.desc()).first()
-                    if saved_record:
-                        wa_status = result.get("status", "failed")
-                        saved_record.whatsapp_status = "SENT" if wa_status in ("queued", "sent", "delivered") else "FAILED"
-                        db.commit()
-                    logger.info(
-                        f"WhatsApp notification sent | Merchant: {merchant.merchant_id} | "
-                        f"SID: {result.get('sid')} | Status: {result.get('status')}"
-                    )
+                    if background_tasks is not None:
+                        # Twilio round trip runs after the response is sent
+                        background_tasks.add_task(Orchestrator._send_and_record, saved_risk.id, send_kwargs)
+                        logger.info(f"[WhatsApp] Queued notification for {merchant.merchant_id} → {send_to}")
+                    else:
+                        Orchestrator._send_and_record(saved_risk.id, send_kwargs, db=db)
                 except Exception as e:
                     logger.error(
                         f"Failed to send WhatsApp notification for {merchant.merchant_id}: {e}",
@@ -170,3 +157,182 @@ class Orchestrator:
         
         # Step 9: Return decision
         return underwriting_decision
+
+    async def process_underwriting_async(
+        self,
+        merchant: MerchantInput,
+        db: Session,
+        mode: Optional[str] = None
+    ) -> UnderwritingDecision:
+        """
+        process_underwriting for async callers, minus the WhatsApp step.
+
+        The Claude call runs on a worker thread, so several of these can be
+        awaited together (asyncio.gather) and overlap their round trips.
+        Database work stays on the calling thread, between awaits, so a
+        single Session may be shared by concurrent calls.
+
+        Returns:
+            UnderwritingResult with the Claude (or fallback) explanation
+        """
+        MerchantService.create_merchant(db, merchant)
+
+        underwriting_decision, explain_job = self._evaluate(merchant, mode, defer_explanation=True)
+        underwriting_decision.explanation = await asyncio.to_thread(
+            ClaudeUnderwritingAgent.generate_explanation, **explain_job, client=self.anthropic_client
+        )
+
+        RiskScoreService.create_risk_record(db, underwriting_decision)
+        return underwriting_decision
+
+    @staticmethod
+    def _send_and_record(risk_score_id: int, send_kwargs: dict, db: Optional[Session] = None) -> None:
+        """
+        Send the offer WhatsApp and store the outcome on its risk record.
+
+        Without ``db`` it opens (and closes) its own session, so it can run as
+        a background task after the request that scheduled it has returned.
+        """
+        result = WhatsAppService().send_underwriting_result(**send_kwargs)
+        wa_status = result.get("status", "failed")
+
+        owns_session = db is None
+        if owns_session:
+            from app.db.session import SessionLocal
+            db = SessionLocal()
+        try:
+            db.query(RiskScore).filter(RiskScore.id == risk_score_id).update(
+                {RiskScore.whatsapp_status: "SENT" if wa_status in ("queued", "sent", "delivered") else "FAILED"},
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            if owns_session:
+                db.close()
+        logger.info(
+            f"WhatsApp notification sent | Merchant: {send_kwargs['merchant_id']} | "
+            f"SID: {result.get('sid')} | Status: {wa_status}"
+        )
+
+    def process_underwriting_batch(
+        self,
+        merchants: List[MerchantInput],
+        db: Session,
+        mode: Optional[str] = None
+    ) -> List[UnderwritingDecision]:
+        """
+        Underwrite several merchants with one merchant lookup and one commit.
+
+        Same scoring/decision/offer/explanation path as process_underwriting,
+        but new merchant rows and all risk records are added to the session
+        and committed together instead of one round-trip pair per merchant,
+        and all explanations come from one generate_explanations_batch call.
+        Never sends WhatsApp — batch callers (engine run, batch API) own
+        delivery.
+
+        All-or-nothing: if any merchant fails the session is rolled back, the
+        failing merchant is logged and the exception propagates, so callers
+        can fall back to the per-merchant path.
+
+        Returns:
+            List of UnderwritingResult in the same order as ``merchants``
+        """
+        ids = [m.merchant_id for m in merchants]
+        existing = {
+            row.merchant_id
+            for row in db.query(MerchantModel.merchant_id).filter(MerchantModel.merchant_id.in_(ids))
+        }
+
+        decisions = []
+        explain_jobs = []
+        failed_on = None  # merchant being evaluated; None once all are built
+        try:
+            for merchant in merchants:
+                failed_on = merchant.merchant_id
+                if merchant.merchant_id not in existing:
+                    db.add(MerchantService.build_merchant(merchant))
+                    existing.add(merchant.merchant_id)
+
+                underwriting_decision, explain_job = self._evaluate(
+                    merchant, mode, defer_explanation=True
+                )
+                decisions.append(underwriting_decision)
+                explain_jobs.append(explain_job)
+            failed_on = None
+
+            # One Claude call per sub-batch (degrades to fallback text)
+            explanations = ClaudeUnderwritingAgent.generate_explanations_batch(
+                explain_jobs, client=self.anthropic_client
+            )
+            for underwriting_decision, explanation in zip(decisions, explanations):
+                underwriting_decision.explanation = explanation
+                db.add(RiskScoreService.build_risk_record(underwriting_decision))
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            where = f"on merchant {failed_on}" if failed_on else "saving the batch"
+            logger.error(f"[Batch] Underwriting {len(merchants)} merchants failed {where}: {e}")
+            raise
+
+        return decisions
+
+    def _evaluate(
+        self,
+        merchant: MerchantInput,
+        mode: Optional[str],
+        defer_explanation: bool = False
+    ) -> Tuple[UnderwritingDecision, Optional[dict]]:
+        """
+        Steps 2–6 of the underwriting flow — pure computation plus the Claude
+        call, no persistence.
+
+        Returns (decision, explain_job). explain_job is None unless
+        defer_explanation is set, in which case the decision carries the
+        fallback explanation and explain_job holds the generate_explanation
+        kwargs for the caller to enqueue once the record has an id.
+        """
+        # Step 2: Evaluate risk with hard rules and weighted scoring
+        risk_result = RiskEngine.evaluate_risk(merchant)
+        
+        # Step 3: Evaluate decision based on risk result
+        risk_tier, decision, _ = DecisionEngine.evaluate(risk_result)
+        
+        # Step 4: Calculate financial offer based on mode
+        financial_offer = OfferEngine.calculate_financial_offer(
+            risk_tier=risk_tier,
+            merchant_data=merchant.dict(),
+            mode=mode
+        )
+        
+        # Step 5: Generate Claude AI explanation (with automatic fallback)
+        explain_kwargs = dict(
+            merchant_data=merchant.dict(),
+            risk_score=risk_result["score"],
+            risk_tier=risk_tier,
+            decision=decision,
+            category_benchmark=risk_result.get("category_benchmark", {}),
+            gmv_yoy_pct=risk_result.get("gmv_yoy_pct"),
+            score_breakdown=risk_result.get("score_breakdown", {}),
+        )
+        explain_job = None
+        if defer_explanation:
+            ai_explanation = ClaudeUnderwritingAgent._fallback_explanation(
+                explain_kwargs["merchant_data"], risk_result["score"], risk_tier, decision
+            )
+            explain_job = explain_kwargs
+        else:
+            ai_explanation = ClaudeUnderwritingAgent.generate_explanation(
+                **explain_kwargs, client=self.anthropic_client
+            )
+        
+        # Step 6: Construct UnderwritingResult with AI explanation and financial offer
+        underwriting_decision = UnderwritingDecision(
+            merchant_id=merchant.merchant_id,
+            risk_score=risk_result["score"],
+            risk_tier=risk_tier,
+            decision=decision,
+            explanation=ai_explanation,
+            financial_offer=financial_offer
+        )
+        return underwriting_decision, explain_job
@@ -11,11 +11,39 @@ sys.path.insert(0, '.')
 from app.orchestrator.orchestrator import Orchestrator
 from app.db.session import SessionLocal
 from app.schemas.merchant_schema import MerchantInput
+from app.services.engine_service import _APPROVED_CODES, _REJECTED_CODES
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+VALID_DECISIONS = _APPROVED_CODES | _REJECTED_CODES
+
+# Broken-credential shapes to run the same underwriting call against
+BROKEN_CREDENTIALS = [
+    ("invalid auth token", {"TWILIO_AUTH_TOKEN": "INVALID_TOKEN_12345"}),
+    ("missing auth token", {"TWILIO_AUTH_TOKEN": None}),
+    ("bad account SID",    {"TWILIO_ACCOUNT_SID": "AC_NOT_A_REAL_SID"}),
+]
+
+
+def _check(condition, message):
+    """Explicit check — unlike assert, still runs under python -O."""
+    if not condition:
+        raise AssertionError(message)
+
+
+def _set_env(overrides):
+    """Apply env overrides (None = unset) and return the previous values."""
+    previous = {key: os.environ.get(key) for key in overrides}
+    for key, value in overrides.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    return previous
+
+
 def test_whatsapp_failure_resilience():
     """Test that API is resilient to WhatsApp failures"""
     
@@ -23,9 +51,6 @@ def test_whatsapp_failure_resilience():
     print("STEP D: WHATSAPP FAILURE MODE RESILIENCE TEST")
     print("=" * 80 + "\n")
     
-    # Save original Twilio token
-    original_token = os.getenv("TWILIO_AUTH_TOKEN")
-    
     # Test merchant
     test_merchant = MerchantInput(
         merchant_id="FAILURE_TEST_001",
@@ -49,43 +74,44 @@ def test_whatsapp_failure_resilience():
     print("  4. Restore credentials\n")
     
     try:
-        # Step 1: Create broken environment
-        print("[STEP 1] Breaking Twilio credentials...")
-        os.environ["TWILIO_AUTH_TOKEN"] = "INVALID_TOKEN_12345"
-        print("  ✅ Token set to invalid value\n")
-        
-        # Step 2: Process with WhatsApp (will fail)
-        print("[STEP 2] Processing underwriting WITH WhatsApp (broken)...")
-        whatsapp_number = "whatsapp:+918999980406"
-        
-        decision = orchestrator.process_underwriting(test_merchant, db, whatsapp_number)
-        
-        print(f"  ✅ Underwriting completed despite WhatsApp failure!")
-        print(f"  ✅ Tier: {decision.risk_tier}")
-        print(f"  ✅ Decision: {decision.decision}")
-        print(f"  ✅ Score: {decision.risk_score}/100")
-        print(f"  ✅ Explanation: {decision.explanation[:50]}...\n")
-        
-        # Step 3: Verify response is valid
-        print("[STEP 3] Validating API resilience...")
-        assert decision.merchant_id == "FAILURE_TEST_001", "Merchant ID mismatch"
-        assert decision.decision in ["APPROVED", "APPROVED_WITH_CONDITIONS", "REJECTED", "AUTO_REJECTED"], "Invalid decision"
-        assert 0 <= decision.risk_score <= 100, "Invalid score range"
-        assert decision.explanation is not None and len(decision.explanation) > 0, "No explanation"
-        print("  ✅ All assertions passed")
-        print("  ✅ API is PRODUCTION-SAFE\n")
-        
-        # Step 4: Restore credentials
-        print("[STEP 4] Restoring Twilio credentials...")
-        os.environ["TWILIO_AUTH_TOKEN"] = original_token
-        print("  ✅ Credentials restored\n")
-        
+        for label, overrides in BROKEN_CREDENTIALS:
+            # Step 1: Create broken environment
+            print(f"[STEP 1] Breaking Twilio credentials — {label}...")
+            previous = _set_env(overrides)
+            print("  ✅ Credentials broken\n")
+
+            try:
+                # Step 2: Process with WhatsApp (will fail)
+                print("[STEP 2] Processing underwriting WITH WhatsApp (broken)...")
+                whatsapp_number = "whatsapp:+918999980406"
+
+                decision = orchestrator.process_underwriting(test_merchant, db, whatsapp_number)
+
+                print(f"  ✅ Underwriting completed despite WhatsApp failure!")
+                print(f"  ✅ Tier: {decision.risk_tier}")
+                print(f"  ✅ Decision: {decision.decision}")
+                print(f"  ✅ Score: {decision.risk_score}/100")
+                print(f"  ✅ Explanation: {decision.explanation[:50]}...\n")
+
+                # Step 3: Verify response is valid
+                print("[STEP 3] Validating API resilience...")
+                _check(decision.merchant_id == "FAILURE_TEST_001", "Merchant ID mismatch")
+                _check(decision.decision in VALID_DECISIONS, "Invalid decision")
+                _check(0 <= decision.risk_score <= 100, "Invalid score range")
+                _check(bool(decision.explanation), "No explanation")
+                print("  ✅ All checks passed\n")
+            finally:
+                # Step 4: Restore credentials
+                print("[STEP 4] Restoring Twilio credentials...")
+                _set_env(previous)
+                print("  ✅ Credentials restored\n")
+
         print("=" * 80)
         print("✅ RESILIENCE TEST PASSED")
         print("=" * 80)
         print("\nKey Findings:")
         print("  ✅ WhatsApp failure does NOT block underwriting API")
-        print("  ✅ Decision is returned even with broken credentials")
+        print(f"  ✅ Decision is returned for all {len(BROKEN_CREDENTIALS)} broken-credential shapes")
         print("  ✅ Error is logged but not re-raised")
         print("  ✅ System is safe for production")
         print("\nProof:")
@@ -94,18 +120,15 @@ def test_whatsapp_failure_resilience():
         print("  - No exception reached client")
         print("  - Error handled gracefully in orchestrator")
         print("\n" + "=" * 80 + "\n")
-        
-        db.close()
         return True
-        
+
     except Exception as e:
         print(f"\n❌ UNEXPECTED ERROR: {str(e)}")
-        # Restore anyway
-        os.environ["TWILIO_AUTH_TOKEN"] = original_token
         import traceback
         traceback.print_exc()
-        db.close()
         return False
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     success = test_whatsapp_failure_resilience()
@@ -1,5 +1,4 @@
 from sqlalchemy.orm import Session
-import json
 from app.models.risk_score import RiskScore
 from app.schemas.decision_schema import UnderwritingDecision
 
@@ -23,21 +22,28 @@ class RiskScoreService:
         Returns:
             RiskScore: Created risk score record
         """
-        # Serialize financial_offer to JSON if present
-        financial_offer_json = None
+        db_risk = RiskScoreService.build_risk_record(decision)
+        db.add(db_risk)
+        # No refresh(): every default is Python-side and expire_on_commit=False,
+        # so the row (incl. autoincrement id) is already fully populated.
+        db.commit()
+        return db_risk
+
+    @staticmethod
+    def build_risk_record(decision: UnderwritingDecision) -> RiskScore:
+        """
+        Map an UnderwritingDecision onto a new (unsaved) RiskScore row.
+        """
+        # JSON column — store the offer as a plain dict
+        financial_offer = None
         if decision.financial_offer:
-            financial_offer_json = decision.financial_offer.model_dump_json()
+            financial_offer = decision.financial_offer.model_dump(mode="json")
         
-        db_risk = RiskScore(
+        return RiskScore(
             merchant_id=decision.merchant_id,
             risk_score=decision.risk_score,
             risk_tier=decision.risk_tier,
             decision=decision.decision,
             explanation=decision.explanation,
-            financial_offer=financial_offer_json
+            financial_offer=financial_offer
         )
-        db.add(db_risk)
-        db.commit()
-        db.refresh(db_risk)
-        return db_risk
-
@@ -7,15 +7,38 @@ from app.models.system_config import SystemConfig
 
 
 def get_config(db: Session, key: str, default: str = "") -> str:
-    row = db.query(SystemConfig).filter(SystemConfig.key == key).first()
-    return row.value if row and row.value is not None else default
+    # Select the column only — always reflects the latest row, even when the
+    # value was written by set_config's Core UPSERT in this same session.
+    value = db.query(SystemConfig.value).filter(SystemConfig.key == key).scalar()
+    return value if value is not None else default
 
 
-def set_config(db: Session, key: str, value: str) -> None:
-    row = db.query(SystemConfig).filter(SystemConfig.key == key).first()
-    if row:
-        row.value = value
+def set_config(db: Session, key: str, value: str, commit: bool = True) -> None:
+    """
+    Insert or update a config row in a single round-trip.
+
+    Uses the dialect's native UPSERT (SQLite / Postgres ON CONFLICT) and falls
+    back to SELECT-then-UPDATE on other backends. Pass commit=False when the
+    caller groups several writes into its own transaction.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(SystemConfig).values(key=key, value=value)
+        stmt = stmt.on_conflict_do_update(index_elements=["key"], set_={"value": value})
+        db.execute(stmt)
+    else:
+        row = db.query(SystemConfig).filter(SystemConfig.key == key).first()
+        if row:
+            row.value = value
+        else:
+            db.add(SystemConfig(key=key, value=value))
+
+    if commit:
+        db.commit()
     else:
-        row = SystemConfig(key=key, value=value)
-        db.add(row)
-    db.commit()
+        db.flush()
+
@@ -10,24 +10,60 @@ WA sending logic:
   - AUTO/MANUAL mode only governs API-triggered (per-merchant) flows.
   - REJECTED merchants never receive a WhatsApp message.
   - Test-override routes all sends to the override number when enabled.
+
+The send gate is a strategy picked once at import:
+  - EngineAlwaysSend (default)  → behaviour above
+  - RespectAutoMode             → set ENGINE_ALWAYS_SEND=0 to make engine runs
+                                  honour the AUTO/MANUAL setting as well
 """
 
 import json
 import logging
 import os
-from typing import Dict
+from typing import Dict, Protocol
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models.merchant import Merchant
 from app.models.risk_score import RiskScore
 from app.orchestrator.orchestrator import Orchestrator
-from app.schemas.merchant_schema import MerchantInput
 from app.services.config_service import get_config, set_config
+from app.services.merchant_service import MerchantService
 from app.services.whatsapp_service import WhatsAppService, normalize_wa_number
 
 logger = logging.getLogger(__name__)
 
+# Exact decision codes — single source of truth for stats and the WA gate
+_APPROVED_CODES = frozenset({"APPROVED", "APPROVED_WITH_CONDITIONS"})
+_REJECTED_CODES = frozenset({"REJECTED", "AUTO_REJECTED"})
+
+
+class WaGatePolicy(Protocol):
+    """Decides whether an engine run may send WhatsApp to non-rejected merchants."""
+
+    def allows_send(self, db: Session) -> bool:
+        ...
+
+
+class EngineAlwaysSend:
+    """Engine run is an explicit admin action — always send, ignore AUTO/MANUAL."""
+
+    def allows_send(self, db: Session) -> bool:
+        return True
+
+
+class RespectAutoMode:
+    """Only send when underwriting_mode is AUTO, same as API-triggered flows."""
+
+    def allows_send(self, db: Session) -> bool:
+        return get_config(db, "underwriting_mode", "AUTO") == "AUTO"
+
+
+_WA_GATE_POLICY: WaGatePolicy = (
+    EngineAlwaysSend() if os.getenv("ENGINE_ALWAYS_SEND", "1") == "1" else RespectAutoMode()
+)
+
 
 class EngineService:
     """
@@ -35,8 +71,10 @@ class EngineService:
 
     For each stored merchant (limit 10):
     - Builds MerchantInput from DB row
-    - Calls Orchestrator.process_underwriting()
-    - Sends WhatsApp if AUTO mode is ON and mobile number is present
+    - Underwrites all of them via Orchestrator().process_underwriting_batch()
+      (one commit), falling back to process_underwriting() per merchant
+    - Sends WhatsApp to non-rejected merchants with a mobile number,
+      gated by the module's WaGatePolicy
 
     Never raises — failures are logged and the engine continues.
     """
@@ -71,6 +109,53 @@ class EngineService:
             "details": [],
         }
 
+        # Gate and test-override are resolved once per run, not per merchant
+        wa_allowed = _WA_GATE_POLICY.allows_send(db)
+        test_override = get_config(db, "test_mobile_override_enabled", "false")
+        test_num = get_config(db, "test_mobile_number", "")
+        override_normalized = (
+            normalize_wa_number(test_num) if test_override == "true" and test_num else None
+        )
+
+        # ── Phase 1: build MerchantInput fresh from each DB row ──
+        inputs = {m.merchant_id: MerchantService.to_merchant_input(m) for m in merchants}
+
+        # ── Phase 2: underwrite the whole batch in one transaction ──
+        # Falls back to the per-merchant path if the batch fails, so one bad
+        # merchant only costs itself, not the run.
+        decisions = {}
+        orchestrator = Orchestrator()
+        try:
+            batch = orchestrator.process_underwriting_batch(list(inputs.values()), db, mode=None)
+            decisions = {d.merchant_id: d for d in batch}
+        except Exception as e:
+            logger.warning(f"[Engine] Batch underwriting failed ({e}) — retrying per merchant")
+            for merchant_id, merchant_input in inputs.items():
+                try:
+                    # whatsapp_number=None — engine handles WA itself below,
+                    # so orchestrator's AUTO/MANUAL gate never blocks us.
+                    decisions[merchant_id] = orchestrator.process_underwriting(
+                        merchant=merchant_input,
+                        db=db,
+                        whatsapp_number=None,
+                        mode=None,
+                    )
+                except Exception as merchant_err:
+                    db.rollback()
+                    logger.error(f"[Engine] Failed to process {merchant_id}: {merchant_err}", exc_info=True)
+
+        # ── Phase 3: stats + WhatsApp per merchant ──
+        # Each merchant's newest risk record (the one just saved), in one query
+        latest_ids = (
+            db.query(func.max(RiskScore.id))
+            .filter(RiskScore.merchant_id.in_(list(decisions)))
+            .group_by(RiskScore.merchant_id)
+        )
+        saved_records = {
+            rs.merchant_id: rs
+            for rs in db.query(RiskScore).filter(RiskScore.id.in_(latest_ids.scalar_subquery()))
+        }
+
         for merchant in merchants:
             row_detail = {
                 "merchant_id": merchant.merchant_id,
@@ -78,70 +163,45 @@ class EngineService:
                 "tier": "—",
                 "wa_status": "SKIPPED",
             }
+            # Fields that only go to the per-merchant log record, not the summary
+            wa_sid = None
+            error = None
+            failure = None
 
             try:
-                # Build MerchantInput fresh from current DB row — always uses latest data
-                merchant_input = MerchantInput(
-                    merchant_id=merchant.merchant_id,
-                    category=merchant.category or "General",
-                    monthly_revenue=merchant.monthly_revenue,
-                    credit_score=merchant.credit_score,
-                    years_in_business=merchant.years_in_business,
-                    existing_loans=merchant.existing_loans or 0,
-                    past_defaults=merchant.past_defaults or 0,
-                    gmv=merchant.gmv or 0.0,
-                    refund_rate=merchant.refund_rate or 0.0,
-                    chargeback_rate=merchant.chargeback_rate or 0.0,
-                    coupon_redemption_rate=merchant.coupon_redemption_rate or 0.0,
-                    unique_customer_count=merchant.unique_customer_count or 0,
-                    customer_return_rate=merchant.customer_return_rate or 0.0,
-                    avg_order_value=merchant.avg_order_value or 0.0,
-                    seasonality_index=merchant.seasonality_index or 1.0,
-                    deal_exclusivity_rate=merchant.deal_exclusivity_rate or 0.0,
-                    return_and_refund_rate=merchant.return_and_refund_rate or 0.0,
-                )
-
-                # Pass whatsapp_number=None — engine handles WA itself below,
-                # so orchestrator's AUTO/MANUAL gate never blocks us.
-                decision = Orchestrator.process_underwriting(
-                    merchant=merchant_input,
-                    db=db,
-                    whatsapp_number=None,
-                    mode=None,
-                )
+                decision = decisions.get(merchant.merchant_id)
+                if decision is None:
+                    raise RuntimeError("no underwriting decision produced")
 
                 stats["processed"] += 1
                 row_detail["decision"] = decision.decision
                 row_detail["tier"] = decision.risk_tier
 
-                if "APPROVED" in decision.decision:
+                if decision.decision in _APPROVED_CODES:
                     stats["approved"] += 1
                 else:
                     stats["rejected"] += 1
 
-                # ── Engine WA send: always fires for non-rejected, ignores AUTO/MANUAL ──
-                # Reads fresh config each iteration so changes take effect immediately.
-                saved_rs = db.query(RiskScore).filter(
-                    RiskScore.merchant_id == merchant.merchant_id
-                ).order_by(RiskScore.id.desc()).first()
+                # ── Engine WA send: fires for non-rejected when the gate policy allows ──
+                saved_rs = saved_records.get(merchant.merchant_id)
 
-                if decision.decision != "REJECTED":
+                if decision.decision not in _REJECTED_CODES and not wa_allowed:
+                    row_detail["wa_status"] = "SKIPPED"
+                    stats["wa_skipped"] += 1
+                    logger.debug("[Engine] Skipping WA for %s — MANUAL mode", merchant.merchant_id)
+                elif decision.decision not in _REJECTED_CODES:
                     # Resolve destination number (test-override takes priority)
-                    test_override = get_config(db, "test_mobile_override_enabled", "false")
-                    test_num = get_config(db, "test_mobile_number", "")
-
-                    if test_override == "true" and test_num:
-                        raw_dest = test_num
-                        logger.info(f"[Engine] TestMode → routing {merchant.merchant_id} WA to {raw_dest}")
+                    if override_normalized is not None:
+                        to_number = override_normalized
+                        logger.debug("[Engine] TestMode → routing %s WA to %s", merchant.merchant_id, test_num)
                     else:
                         raw_dest = merchant.mobile_number or ""
-
-                    to_number = normalize_wa_number(raw_dest) if raw_dest else ""
+                        to_number = normalize_wa_number(raw_dest) if raw_dest else ""
 
                     if not to_number:
-                        logger.info(
-                            f"[Engine] No valid mobile for {merchant.merchant_id} "
-                            f"(mobile={merchant.mobile_number!r}) — skipping WA"
+                        logger.debug(
+                            "[Engine] No valid mobile for %s (mobile=%r) — skipping WA",
+                            merchant.merchant_id, merchant.mobile_number,
                         )
                         row_detail["wa_status"] = "SKIPPED"
                         stats["wa_skipped"] += 1
@@ -154,14 +214,8 @@ class EngineService:
                                 if getattr(merchant, "secure_token", None)
                                 else ""
                             )
-                            # Serialize financial offer for message formatter
-                            import json as _json
-                            fo_dict = {}
-                            if saved_rs and saved_rs.financial_offer:
-                                try:
-                                    fo_dict = _json.loads(saved_rs.financial_offer)
-                                except Exception:
-                                    fo_dict = {}
+                            # Financial offer for the message formatter (JSON column → dict)
+                            fo_dict = (saved_rs.financial_offer if saved_rs else None) or {}
 
                             wa_svc = WhatsAppService()
                             result = wa_svc.send_underwriting_result(
@@ -174,41 +228,56 @@ class EngineService:
                                 explanation=saved_rs.explanation or "" if saved_rs else "",
                                 financial_offer=fo_dict,
                                 secure_offer_link=offer_link,
+                                force=True,  # engine run always sends, see module docstring
                             )
 
                             wa_status_val = result.get("status", "failed")
                             is_sent = wa_status_val in ("queued", "sent", "delivered")
 
+                            # Committed once, with the run summary below
                             if saved_rs:
                                 saved_rs.whatsapp_status = "SENT" if is_sent else "FAILED"
-                                db.commit()
 
                             row_detail["wa_status"] = "SENT" if is_sent else "FAILED"
+                            wa_sid = result.get("sid")
                             if is_sent:
                                 stats["wa_sent"] += 1
-                                logger.info(f"[Engine] WA sent → {merchant.merchant_id} | to={to_number} | sid={result.get('sid')}")
                             else:
                                 stats["wa_failed"] += 1
-                                logger.warning(f"[Engine] WA failed → {merchant.merchant_id} | {result.get('error')}")
+                                error = result.get("error")
 
                         except Exception as wa_err:
                             stats["wa_failed"] += 1
                             row_detail["wa_status"] = "FAILED"
-                            logger.error(f"[Engine] WA exception for {merchant.merchant_id}: {wa_err}", exc_info=True)
+                            error = f"WA exception: {wa_err}"
+                            failure = wa_err
                 else:
                     # REJECTED — never send
                     row_detail["wa_status"] = "NOT_SENT"
                     stats["wa_skipped"] += 1
-                    logger.info(f"[Engine] Skipping WA for {merchant.merchant_id} — REJECTED")
+                    logger.debug("[Engine] Skipping WA for %s — REJECTED", merchant.merchant_id)
 
             except Exception as e:
                 stats["errors"] += 1
-                logger.error(f"[Engine] Failed to process {merchant.merchant_id}: {e}", exc_info=True)
                 row_detail["wa_status"] = "ERROR"
-
+                error = str(e)
+                failure = e
+
+            # One structured record per merchant — fields also ride on extra=
+            # for handlers that format records as JSON
+            record = dict(row_detail, wa_sid=wa_sid, wa_error=error)
+            logger.log(
+                logging.WARNING if error else logging.INFO,
+                "[Engine] %s | decision=%s | tier=%s | wa=%s | sid=%s | error=%s",
+                merchant.merchant_id, row_detail["decision"], row_detail["tier"],
+                row_detail["wa_status"], wa_sid, error,
+                extra=record,
+                exc_info=failure,
+            )
             stats["details"].append(row_detail)
 
-        # Persist summary for dashboard display
+        # Persist summary for dashboard display — one commit for it and every
+        # whatsapp_status set above
         set_config(db, "last_engine_summary", json.dumps(stats))
 
         logger.info(
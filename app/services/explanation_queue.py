@@ -0,0 +1,96 @@
+"""
+Background Explanation Queue
+============================
+Moves the Claude explanation call (0.5–2s per merchant) off the underwriting
+critical path.
+
+Callers save the risk record with the deterministic fallback explanation,
+then enqueue a job here. Worker threads drain up to BATCH_SIZE queued jobs,
+explain them with one Claude call (generate_explanations_batch) and
+overwrite risk_scores.explanation for each record id.
+
+Workers are daemon threads started lazily on the first enqueue.
+"""
+
+import logging
+import os
+import queue
+import threading
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+EXPLANATION_WORKERS = int(os.getenv("EXPLANATION_WORKERS", "2"))
+BATCH_SIZE = int(os.getenv("EXPLANATION_BATCH_SIZE", "8"))   # merchants per Claude call
+
+_queue: "queue.Queue[dict]" = queue.Queue()
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+
+
+def enqueue_explanation(risk_score_id: int, **explain_kwargs) -> None:
+    """
+    Queue a Claude explanation for an already-saved risk record.
+
+    explain_kwargs are passed straight to
+    ClaudeUnderwritingAgent.generate_explanation.
+    """
+    _ensure_workers()
+    _queue.put({"risk_score_id": risk_score_id, "kwargs": explain_kwargs})
+
+
+def pending() -> int:
+    """Approximate number of explanation jobs not yet picked up."""
+    return _queue.qsize()
+
+
+def _ensure_workers() -> None:
+    if len(_workers) >= EXPLANATION_WORKERS:
+        return
+    with _workers_lock:
+        while len(_workers) < EXPLANATION_WORKERS:
+            worker = threading.Thread(
+                target=_worker_loop,
+                daemon=True,
+                name=f"explanation-worker-{len(_workers) + 1}",
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def _worker_loop() -> None:
+    while True:
+        # Block for one job, then take whatever else is already waiting
+        jobs = [_queue.get()]
+        while len(jobs) < BATCH_SIZE:
+            try:
+                jobs.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _process(jobs)
+        except Exception as e:
+            ids = [job["risk_score_id"] for job in jobs]
+            logger.error(f"[Explain] Batch for risk records {ids} failed: {e}", exc_info=True)
+        finally:
+            for _ in jobs:
+                _queue.task_done()
+
+
+def _process(jobs: List[dict]) -> None:
+    from app.db.session import SessionLocal
+    from app.models.risk_score import RiskScore
+    from app.services.underwriting_agent import ClaudeUnderwritingAgent
+
+    explanations = ClaudeUnderwritingAgent.generate_explanations_batch([job["kwargs"] for job in jobs])
+
+    db = SessionLocal()
+    try:
+        db.bulk_update_mappings(RiskScore, [
+            {"id": job["risk_score_id"], "explanation": explanation}
+            for job, explanation in zip(jobs, explanations)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    logger.debug(f"[Explain] Stored {len(jobs)} explanation(s)")
@@ -0,0 +1,51 @@
+"""
+Helpers to read/write MerchantFingerprint rows.
+"""
+
+from typing import Dict
+
+from sqlalchemy.orm import Session
+from app.models.merchant_fingerprint import MerchantFingerprint
+
+
+def set_fingerprints(db: Session, values: Dict[str, bytes], commit: bool = True) -> None:
+    """
+    Upsert many fingerprints with multi-row INSERT ... ON CONFLICT statements.
+
+    SQLite and Postgres use their native ON CONFLICT UPSERT; other backends
+    fall back to one merge() per row. Commits unless commit=False, for
+    callers that group these writes into their own transaction.
+    """
+    if not values:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        rows = [{"merchant_id": k, "fp": v} for k, v in values.items()]
+        # Chunked to stay well under SQLite's bound-parameter limit
+        for start in range(0, len(rows), 500):
+            stmt = insert(MerchantFingerprint).values(rows[start:start + 500])
+            stmt = stmt.on_conflict_do_update(index_elements=["merchant_id"], set_={"fp": stmt.excluded.fp})
+            db.execute(stmt)
+    else:
+        for merchant_id, fp in values.items():
+            db.merge(MerchantFingerprint(merchant_id=merchant_id, fp=fp))
+
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+
+def delete_fingerprint(db: Session, merchant_id: str, commit: bool = True) -> None:
+    """Forget a merchant's fingerprint so the next monitor cycle re-assesses it."""
+    db.query(MerchantFingerprint).filter(
+        MerchantFingerprint.merchant_id == merchant_id
+    ).delete(synchronize_session=False)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
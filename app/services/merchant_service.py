@@ -2,6 +2,29 @@ from sqlalchemy.orm import Session
 from app.models.merchant import Merchant
 from app.schemas.merchant_schema import MerchantInput
 
+# (field, default) pairs for rebuilding a MerchantInput from a stored row.
+# default=None marks a required column, passed through as-is; for the rest a
+# NULL/zero/empty value falls back to the default.
+_FIELD_DEFAULTS = (
+    ("merchant_id", None),
+    ("category", "General"),
+    ("monthly_revenue", None),
+    ("credit_score", None),
+    ("years_in_business", None),
+    ("existing_loans", 0),
+    ("past_defaults", 0),
+    ("gmv", 0.0),
+    ("refund_rate", 0.0),
+    ("chargeback_rate", 0.0),
+    ("coupon_redemption_rate", 0.0),
+    ("unique_customer_count", 0),
+    ("customer_return_rate", 0.0),
+    ("avg_order_value", 0.0),
+    ("seasonality_index", 1.0),
+    ("deal_exclusivity_rate", 0.0),
+    ("return_and_refund_rate", 0.0),
+)
+
 
 class MerchantService:
     """
@@ -24,7 +47,22 @@ class MerchantService:
         if existing:
             return existing
 
-        db_merchant = Merchant(
+        db_merchant = MerchantService.build_merchant(merchant_input)
+        db.add(db_merchant)
+        # No refresh(): every default is Python-side and expire_on_commit=False,
+        # so the row (incl. autoincrement id) is already fully populated.
+        db.commit()
+        return db_merchant
+    
+    @staticmethod
+    def build_merchant(merchant_input: MerchantInput) -> Merchant:
+        """
+        Map a MerchantInput onto a new (unsaved) Merchant row.
+
+        Shared by create_merchant and the orchestrator's batch path, which adds
+        several rows before a single commit.
+        """
+        return Merchant(
             merchant_id=merchant_input.merchant_id,
             monthly_revenue=merchant_input.monthly_revenue,
             credit_score=merchant_input.credit_score,
@@ -44,11 +82,22 @@ class MerchantService:
             chargeback_rate=getattr(merchant_input, 'chargeback_rate', 0.0),
             # secure_token is auto-generated by SQLAlchemy default
         )
-        db.add(db_merchant)
-        db.commit()
-        db.refresh(db_merchant)
-        return db_merchant
-    
+
+    @staticmethod
+    def to_merchant_input(merchant: Merchant) -> MerchantInput:
+        """
+        Build a MerchantInput from a stored Merchant row — always the latest data.
+
+        Uses model_construct (no validation): the row is trusted, having been
+        validated on the way in, and this runs for every merchant the engine
+        or monitor re-assesses.
+        """
+        payload = {}
+        for field, default in _FIELD_DEFAULTS:
+            value = getattr(merchant, field)
+            payload[field] = value if default is None else (value or default)
+        return MerchantInput.model_construct(**payload)
+
     @staticmethod
     def get_by_merchant_id(db: Session, merchant_id: str) -> Merchant:
         """
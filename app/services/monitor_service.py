@@ -4,7 +4,8 @@ Background Merchant Monitor
 Runs in a daemon thread when engine_state == "ALWAYS_ON".
 
 Logic per cycle (every POLL_INTERVAL seconds):
-  For each merchant:
+  For each merchant edited since the last cycle (or lacking a fingerprint /
+  risk record — the first cycle in a process scans everyone):
     1. Compute a fingerprint of their scoring-relevant data fields.
     2. Compare with the last stored fingerprint.
     3. If fingerprint changed OR no risk record exists → re-run underwriting.
@@ -16,129 +17,279 @@ Logic per cycle (every POLL_INTERVAL seconds):
 Engine states (stored in config table as "engine_state"):
     OFF        — monitor thread not running, engine inactive
     ON         — run one batch immediately, then set state back to OFF
-    ALWAYS_ON  — run continuously every POLL_INTERVAL seconds
+    ALWAYS_ON  — run continuously, ~POLL_INTERVAL seconds apart (adaptive — see _monitor_loop)
 """
 
-import hashlib
 import json
 import logging
 import os
+import struct
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Optional
 
+import xxhash
+
 logger = logging.getLogger(__name__)
 
 POLL_INTERVAL = int(os.getenv("MONITOR_POLL_INTERVAL", "60"))   # seconds between cycles
+SESSION_RECYCLE_CYCLES = int(os.getenv("MONITOR_SESSION_RECYCLE", "100"))  # cycles per DB session
+# Adaptive pacing: re-run immediately after a busy cycle, back off when idle
+BATCH_THRESHOLD = int(os.getenv("MONITOR_BATCH_THRESHOLD", "10"))   # processed ≥ this → no sleep
+MAX_INTERVAL = int(os.getenv("MONITOR_MAX_INTERVAL", "300"))        # idle back-off cap (seconds)
+WA_SEND_WORKERS = int(os.getenv("MONITOR_WA_WORKERS", "8"))         # parallel Twilio sends per cycle
+STREAM_CHUNK = 200   # merchant rows buffered per fetch in either pass
+# updated_at is stamped (utcnow) when a writer flushes, not when it commits.
+# An edit flushed before a cycle started but committed after that cycle read
+# the table sits just below the cycle's start, so the next cycle shortlists
+# from this far before it. Rows in the margin are fingerprinted again (cheap)
+# and skipped when unchanged.
+WATERMARK_MARGIN = timedelta(seconds=int(os.getenv("MONITOR_WATERMARK_MARGIN", "300")))
+
+# Bump whenever _merchant_fingerprint's algorithm or payload changes — stored
+# fingerprints from another version can never match and are wiped at startup.
+FINGERPRINT_VERSION = "xxh3-4"
 
 # Singleton thread handle
 _monitor_thread: Optional[threading.Thread] = None
 _stop_event = threading.Event()
 
+# Shared WhatsApp service — one pooled Twilio client across sends and cycles
+_wa_svc = None
+_wa_svc_lock = threading.Lock()
+
+# Shortlist watermark: the previous clean cycle's start minus WATERMARK_MARGIN.
+# None (first cycle in this process) forces a full scan.
+_watermark: Optional[datetime] = None
+
 
 # ── Fingerprint helpers ────────────────────────────────────────────────────────
 
-def _merchant_fingerprint(merchant) -> str:
+# Canonical field order: credit_score, monthly_revenue, years_in_business,
+# existing_loans, past_defaults, refund_rate, chargeback_rate,
+# customer_return_rate, deal_exclusivity_rate, return_and_refund_rate,
+# seasonality_index
+_FP_STRUCT = struct.Struct("!idiiidddddd")
+
+
+def _fingerprint_columns(Merchant):
+    """Columns _merchant_fingerprint reads, for tuple-only selects."""
+    return (
+        Merchant.merchant_id,
+        Merchant.credit_score,
+        Merchant.monthly_revenue,
+        Merchant.years_in_business,
+        Merchant.existing_loans,
+        Merchant.past_defaults,
+        Merchant.refund_rate,
+        Merchant.chargeback_rate,
+        Merchant.customer_return_rate,
+        Merchant.deal_exclusivity_rate,
+        Merchant.return_and_refund_rate,
+        Merchant.seasonality_index,
+        Merchant.category,
+        Merchant.mobile_number,
+    )
+
+# Hasher primed with the version once at import; each call clones it, which is
+# cheaper than constructing a fresh one. The prefix also means a version bump
+# changes every digest even before the startup migration runs.
+_HASH_PROTO = xxhash.xxh3_64()
+_HASH_PROTO.update(FINGERPRINT_VERSION.encode())
+
+
+def _merchant_fingerprint(merchant) -> bytes:
     """
-    Return an MD5 hex digest of the merchant's scoring-relevant fields.
+    Return the raw 8-byte xxh3-64 digest of the merchant's scoring-relevant fields.
+    Accepts a Merchant or any row exposing the _fingerprint_columns attributes.
+    Pure change detector — no cryptographic strength needed.
     Includes mobile_number so a phone-number change also triggers re-assessment.
     If ANY of these values change the fingerprint changes → triggers re-assessment + WA.
+
+    Numeric fields are packed in a fixed order (no dict / JSON / key sort);
+    category and mobile follow as NUL-separated UTF-8. Each part is fed to
+    the hasher as-is rather than concatenated into one buffer first — same
+    digest, no intermediate bytes copies.
+    """
+    h = _HASH_PROTO.copy()
+    h.update(_FP_STRUCT.pack(
+        merchant.credit_score,
+        merchant.monthly_revenue,
+        merchant.years_in_business,
+        merchant.existing_loans or 0,
+        merchant.past_defaults or 0,
+        merchant.refund_rate or 0.0,
+        merchant.chargeback_rate or 0.0,
+        merchant.customer_return_rate or 0.0,
+        merchant.deal_exclusivity_rate or 0.0,
+        merchant.return_and_refund_rate or 0.0,
+        merchant.seasonality_index or 1.0,
+    ))
+    h.update((merchant.category or "").encode())
+    h.update(b"\0")
+    # Include mobile so a number change forces re-assessment and re-send
+    h.update((merchant.mobile_number or "").strip().encode())
+    return h.digest()
+
+
+# ── WhatsApp send ──────────────────────────────────────────────────────────────
+
+def _get_wa_svc():
+    """Return the module's WhatsAppService, creating it on first use."""
+    global _wa_svc
+    if _wa_svc is None:
+        with _wa_svc_lock:
+            if _wa_svc is None:
+                from app.services.whatsapp_service import WhatsAppService
+                _wa_svc = WhatsAppService()
+    return _wa_svc
+
+
+def _send_wa(job: dict, rate_limited: threading.Event):
+    """
+    Send one queued offer — runs on a pool thread, so never touches the DB.
+
+    Returns (wa_ok, result), or (False, None) if skipped because the Twilio
+    daily limit (63038) was already hit this cycle.
     """
-    payload = {
-        "credit_score": merchant.credit_score,
-        "monthly_revenue": merchant.monthly_revenue,
-        "years_in_business": merchant.years_in_business,
-        "existing_loans": merchant.existing_loans or 0,
-        "past_defaults": merchant.past_defaults or 0,
-        "refund_rate": round(merchant.refund_rate or 0.0, 4),
-        "chargeback_rate": round(merchant.chargeback_rate or 0.0, 4),
-        "customer_return_rate": round(merchant.customer_return_rate or 0.0, 4),
-        "deal_exclusivity_rate": round(merchant.deal_exclusivity_rate or 0.0, 4),
-        "return_and_refund_rate": round(merchant.return_and_refund_rate or 0.0, 4),
-        "seasonality_index": round(merchant.seasonality_index or 1.0, 4),
-        "category": merchant.category or "",
-        # Include mobile so a number change forces re-assessment and re-send
-        "mobile_number": (merchant.mobile_number or "").strip(),
-    }
-    raw = json.dumps(payload, sort_keys=True)
-    return hashlib.md5(raw.encode()).hexdigest()
+    if rate_limited.is_set():
+        return False, None
+
+    decision = job["decision"]
+    result = _get_wa_svc().send_underwriting_result(
+        to_number=job["to_number"],
+        merchant_id=job["merchant_id"],
+        merchant_name=job["name"],
+        risk_tier=decision.risk_tier,
+        decision=decision.decision,
+        risk_score=decision.risk_score,
+        explanation=decision.explanation or "",
+        financial_offer=job["financial_offer"],
+        secure_offer_link=job["offer_link"],
+    )
+    wa_ok = (
+        result.get("status") in ("queued", "sent", "delivered", "accepted")
+        or (bool(result.get("sid")) and result.get("sid") not in ("N/A", "", None))
+    )
+    if not wa_ok and "63038" in str(result.get("error", "")):
+        rate_limited.set()
+    return wa_ok, result
 
 
 # ── Core cycle ─────────────────────────────────────────────────────────────────
 
-def _run_cycle(db_session_factory) -> dict:
+def _load_merchants(db, Merchant, merchant_ids):
+    """
+    Yield Merchant rows for merchant_ids, STREAM_CHUNK ids per query.
+
+    Chunked IN-queries rather than one streaming cursor: the caller commits
+    per merchant, which would end a cursor held open across the loop.
+    """
+    for start in range(0, len(merchant_ids), STREAM_CHUNK):
+        chunk = merchant_ids[start:start + STREAM_CHUNK]
+        yield from db.query(Merchant).filter(Merchant.merchant_id.in_(chunk)).all()
+
+
+def _run_cycle(db_session_factory, db=None) -> dict:
     """
     Process all merchants in a single monitor cycle.
     Opens its own DB session — safe to call from a background thread OR synchronously.
+    Pass ``db`` to reuse a caller-owned session instead (the monitor thread
+    keeps one across cycles); it is left open for the caller.
     Returns a stats dict: {processed, approved, rejected, wa_sent, wa_failed, wa_skipped}
     """
     from app.models.merchant import Merchant
     from app.models.risk_score import RiskScore
-    from app.schemas.merchant_schema import MerchantInput
+    from app.models.merchant_fingerprint import MerchantFingerprint
+    from app.services.merchant_service import MerchantService
     from app.orchestrator.orchestrator import Orchestrator
     from app.services.config_service import get_config, set_config
-    from app.services.whatsapp_service import WhatsAppService, normalize_wa_number
+    from app.services.fingerprint_service import set_fingerprints
+    from sqlalchemy import exists, func, or_
+    from app.services.whatsapp_service import normalize_wa_number
+
+    global _watermark
 
     stats = {"processed": 0, "approved": 0, "rejected": 0, "wa_sent": 0, "wa_failed": 0, "wa_skipped": 0, "details": [], "rate_limited": False}
-    _rate_limited = False  # set True on first 63038 to skip remaining Twilio calls
+    to_send = []  # approved merchants with a valid number, sent after scoring
+    fp_updates = {}  # merchant_id → fingerprint, flushed once at cycle end
 
-    db = db_session_factory()
+    owns_session = db is None
+    if owns_session:
+        db = db_session_factory()
+    else:
+        # Long-lived session — drop cached rows so edits made elsewhere are seen
+        db.expire_all()
     try:
-        merchants = db.query(Merchant).all()
-        logger.info(f"[Monitor] Cycle started — checking {len(merchants)} merchants")
-
-        for merchant in merchants:
+        cycle_started = datetime.utcnow()
+        # Pass 1 reads only the fingerprinted columns as plain row tuples —
+        # no ORM identity-map / attribute instrumentation per merchant — plus
+        # the stored fingerprint and whether a risk record exists, so neither
+        # lookup table is loaded whole.
+        has_record = exists().where(RiskScore.merchant_id == Merchant.merchant_id)
+        query = db.query(
+            *_fingerprint_columns(Merchant),
+            MerchantFingerprint.fp.label("stored_fp"),
+            has_record.label("has_record"),
+        ).outerjoin(MerchantFingerprint, MerchantFingerprint.merchant_id == Merchant.merchant_id)
+        if _watermark is not None:
+            # Shortlist in SQL: only rows edited since the watermark, or with
+            # no stored fingerprint, or never assessed. Everything else is
+            # unchanged by construction and is never loaded.
+            query = query.filter(or_(
+                Merchant.updated_at.is_(None),
+                Merchant.updated_at >= _watermark,
+                MerchantFingerprint.fp.is_(None),
+                ~has_record,
+            ))
+        had_errors = False
+
+        # Test-override routing is fixed for the whole cycle — read it once
+        test_override = get_config(db, "test_mobile_override_enabled", "false") == "true"
+        test_num = get_config(db, "test_mobile_number", "")
+
+        # Fingerprint the tuples as they stream in (STREAM_CHUNK rows buffered
+        # at a time); remember why each changed merchant needs work
+        fingerprints = {}
+        reasons = {}
+        checked = 0
+        for row in query.yield_per(STREAM_CHUNK):
+            checked += 1
+            fingerprint = _merchant_fingerprint(row)
+            no_record = not row.has_record
+            if fingerprint == row.stored_fp and not no_record:
+                logger.debug(f"[Monitor] {row.merchant_id} — unchanged, skipping")
+                continue
+            fingerprints[row.merchant_id] = fingerprint
+            reasons[row.merchant_id] = "no_record" if no_record else "data_changed"
+
+        logger.info(f"[Monitor] Cycle started — checked {checked} merchants, {len(fingerprints)} changed")
+
+        # Pass 2 hydrates full ORM rows for changed merchants only
+        orchestrator = Orchestrator()
+        for merchant in _load_merchants(db, Merchant, list(fingerprints)):
             try:
-                fingerprint = _merchant_fingerprint(merchant)
-                fp_key = f"fp_{merchant.merchant_id}"
-                stored_fp = get_config(db, fp_key, "")
-
-                # Latest risk record
-                rs = db.query(RiskScore).filter_by(
-                    merchant_id=merchant.merchant_id
-                ).order_by(RiskScore.id.desc()).first()
-
-                data_changed = fingerprint != stored_fp
-                no_record = rs is None
-
-                if not data_changed and not no_record:
-                    logger.debug(f"[Monitor] {merchant.merchant_id} — unchanged, skipping")
-                    continue
-
-                reason = "no_record" if no_record else "data_changed"
-                logger.info(f"[Monitor] {merchant.merchant_id} — re-assessing ({reason})")
+                fingerprint = fingerprints[merchant.merchant_id]
+                logger.info(f"[Monitor] {merchant.merchant_id} — re-assessing ({reasons[merchant.merchant_id]})")
                 stats["processed"] += 1
 
-                merchant_input = MerchantInput(
-                    merchant_id=merchant.merchant_id,
-                    category=merchant.category or "General",
-                    monthly_revenue=merchant.monthly_revenue,
-                    credit_score=merchant.credit_score,
-                    years_in_business=merchant.years_in_business,
-                    existing_loans=merchant.existing_loans or 0,
-                    past_defaults=merchant.past_defaults or 0,
-                    gmv=merchant.gmv or 0.0,
-                    refund_rate=merchant.refund_rate or 0.0,
-                    chargeback_rate=merchant.chargeback_rate or 0.0,
-                    coupon_redemption_rate=merchant.coupon_redemption_rate or 0.0,
-                    unique_customer_count=merchant.unique_customer_count or 0,
-                    customer_return_rate=merchant.customer_return_rate or 0.0,
-                    avg_order_value=merchant.avg_order_value or 0.0,
-                    seasonality_index=merchant.seasonality_index or 1.0,
-                    deal_exclusivity_rate=merchant.deal_exclusivity_rate or 0.0,
-                    return_and_refund_rate=merchant.return_and_refund_rate or 0.0,
-                )
+                merchant_input = MerchantService.to_merchant_input(merchant)
 
-                # Run underwriting (no WA from orchestrator — we handle it below)
-                decision = Orchestrator.process_underwriting(
+                # Run underwriting (no WA from orchestrator — we handle it below).
+                # Claude explanation is queued so it never blocks the cycle; the
+                # WA message doesn't include it anyway.
+                decision = orchestrator.process_underwriting(
                     merchant=merchant_input,
                     db=db,
                     whatsapp_number=None,
                     mode=None,
+                    defer_explanation=True,
                 )
 
-                # Store new fingerprint so we don't re-process unchanged data
-                set_config(db, fp_key, fingerprint)
+                # New fingerprint is written with the rest of the cycle's updates
+                fp_updates[merchant.merchant_id] = fingerprint
 
                 if decision.decision == "REJECTED":
                     logger.info(f"[Monitor] {merchant.merchant_id} → REJECTED — no WA sent")
@@ -148,10 +299,8 @@ def _run_cycle(db_session_factory) -> dict:
                 stats["approved"] += 1
 
                 # ── Send WA ───────────────────────────────────────────────────
-                test_override = get_config(db, "test_mobile_override_enabled", "false")
-                test_num = get_config(db, "test_mobile_number", "")
                 raw_dest = (
-                    test_num if test_override == "true" and test_num
+                    test_num if test_override and test_num
                     else (merchant.mobile_number or "")
                 )
 
@@ -162,23 +311,9 @@ def _run_cycle(db_session_factory) -> dict:
                     stats["details"].append({"merchant_id": merchant.merchant_id, "name": getattr(merchant, "business_name", "") or merchant.merchant_id, "decision": decision.decision, "wa": "skipped", "number": raw_dest or "", "reason": "No valid mobile"})
                     continue
 
-                # If we already hit the daily rate-limit this cycle, skip without calling Twilio
-                if _rate_limited:
-                    stats["wa_failed"] += 1
-                    stats["details"].append({"merchant_id": merchant.merchant_id, "name": getattr(merchant, "business_name", "") or merchant.merchant_id, "decision": decision.decision, "wa": "failed", "number": to_number.replace("whatsapp:", ""), "reason": "[63038] Daily limit reached — skipped"})
-                    continue
-
-                # Fetch latest risk record (just saved by orchestrator)
-                saved_rs = db.query(RiskScore).filter_by(
-                    merchant_id=merchant.merchant_id
-                ).order_by(RiskScore.id.desc()).first()
-
-                fo_dict = {}
-                if saved_rs and saved_rs.financial_offer:
-                    try:
-                        fo_dict = json.loads(saved_rs.financial_offer)
-                    except Exception:
-                        fo_dict = {}
+                # Message content comes straight from the decision just saved —
+                # no need to re-read the risk record
+                fo_dict = decision.financial_offer.dict() if decision.financial_offer else {}
 
                 base_url = os.getenv("APP_BASE_URL", "http://localhost:8000")
                 offer_link = (
@@ -186,66 +321,90 @@ def _run_cycle(db_session_factory) -> dict:
                     if getattr(merchant, "secure_token", None) else ""
                 )
 
-                wa_svc = WhatsAppService()
-                result = wa_svc.send_underwriting_result(
-                    to_number=to_number,
-                    merchant_id=merchant.merchant_id,
-                    merchant_name=getattr(merchant, "business_name", "") or merchant.merchant_id,
-                    risk_tier=decision.risk_tier,
-                    decision=decision.decision,
-                    risk_score=saved_rs.risk_score if saved_rs else 0,
-                    explanation=saved_rs.explanation or "" if saved_rs else "",
-                    financial_offer=fo_dict,
-                    secure_offer_link=offer_link,
-                )
+                # Queue for the parallel send phase below
+                to_send.append({
+                    "merchant_id": merchant.merchant_id,
+                    "name": getattr(merchant, "business_name", "") or merchant.merchant_id,
+                    "decision": decision,
+                    "to_number": to_number,
+                    "financial_offer": fo_dict,
+                    "offer_link": offer_link,
+                })
 
-                wa_ok = (
-                    result.get("status") in ("queued", "sent", "delivered", "accepted")
-                    or (bool(result.get("sid")) and result.get("sid") not in ("N/A", "", None))
-                )
-                if saved_rs:
-                    saved_rs.whatsapp_status = "SENT" if wa_ok else "FAILED"
-                    db.commit()
+            except Exception as e:
+                had_errors = True
+                logger.error(f"[Monitor] Error processing {merchant.merchant_id}: {e}", exc_info=True)
+                try:
+                    db.rollback()
+                except Exception:
+                    pass
 
+        # ── Send phase: WA calls are independent network I/O → bounded pool ──
+        if to_send:
+            rate_limited = threading.Event()  # set on first 63038 to skip remaining Twilio calls
+            with ThreadPoolExecutor(max_workers=WA_SEND_WORKERS) as pool:
+                results = list(pool.map(lambda job: _send_wa(job, rate_limited), to_send))
+
+            wa_statuses = {}
+            for job, (wa_ok, result) in zip(to_send, results):
+                merchant_id = job["merchant_id"]
+                number = job["to_number"].replace("whatsapp:", "")
+                decision = job["decision"]
+                if result is None:
+                    # Skipped without calling Twilio — daily limit already reached
+                    stats["wa_failed"] += 1
+                    stats["details"].append({"merchant_id": merchant_id, "name": job["name"], "decision": decision.decision, "wa": "failed", "number": number, "reason": "[63038] Daily limit reached — skipped"})
+                    continue
+
+                wa_statuses[merchant_id] = "SENT" if wa_ok else "FAILED"
                 if wa_ok:
-                    logger.info(f"[Monitor] \u2705 WA sent \u2192 {merchant.merchant_id} | {to_number} | sid={result.get('sid')}")
+                    logger.info(f"[Monitor] \u2705 WA sent \u2192 {merchant_id} | {job['to_number']} | sid={result.get('sid')}")
                     stats["wa_sent"] += 1
-                    stats["details"].append({"merchant_id": merchant.merchant_id, "name": getattr(merchant, "business_name", "") or merchant.merchant_id, "decision": decision.decision, "wa": "sent", "number": to_number.replace("whatsapp:", ""), "reason": ""})
+                    stats["details"].append({"merchant_id": merchant_id, "name": job["name"], "decision": decision.decision, "wa": "sent", "number": number, "reason": ""})
                 else:
                     err_msg = result.get("error", "Twilio error")
-                    # Detect daily rate-limit — flag all subsequent sends as skipped
-                    if "63038" in str(err_msg):
-                        _rate_limited = True
-                        stats["rate_limited"] = True
-                        logger.warning(f"[Monitor] Twilio daily limit hit — remaining WA sends will be skipped this cycle")
-                    logger.warning(f"[Monitor] \u274c WA failed \u2192 {merchant.merchant_id} | {err_msg}")
+                    logger.warning(f"[Monitor] \u274c WA failed \u2192 {merchant_id} | {err_msg}")
                     stats["wa_failed"] += 1
-                    stats["details"].append({"merchant_id": merchant.merchant_id, "name": getattr(merchant, "business_name", "") or merchant.merchant_id, "decision": decision.decision, "wa": "failed", "number": to_number.replace("whatsapp:", ""), "reason": err_msg})
+                    stats["details"].append({"merchant_id": merchant_id, "name": job["name"], "decision": decision.decision, "wa": "failed", "number": number, "reason": err_msg})
+
+            if rate_limited.is_set():
+                stats["rate_limited"] = True
+                logger.warning(f"[Monitor] Twilio daily limit hit — remaining WA sends were skipped this cycle")
+
+            # whatsapp_status onto each merchant's latest record (committed below)
+            if wa_statuses:
+                latest_ids = (
+                    db.query(RiskScore.merchant_id, func.max(RiskScore.id))
+                    .filter(RiskScore.merchant_id.in_(list(wa_statuses)))
+                    .group_by(RiskScore.merchant_id)
+                    .all()
+                )
+                db.bulk_update_mappings(RiskScore, [
+                    {"id": rs_id, "whatsapp_status": wa_statuses[merchant_id]}
+                    for merchant_id, rs_id in latest_ids
+                ])
 
-            except Exception as e:
-                logger.error(f"[Monitor] Error processing {merchant.merchant_id}: {e}", exc_info=True)
-                try:
-                    db.rollback()
-                except Exception:
-                    pass
+        # One transaction for every fingerprint and WA status this cycle
+        set_fingerprints(db, fp_updates, commit=False)
+        db.commit()
 
-    finally:
-        db.close()
+        # Only advance the watermark on a clean pass — a merchant that errored
+        # must be shortlisted again next cycle
+        if not had_errors:
+            _watermark = cycle_started - WATERMARK_MARGIN
 
-    logger.info(f"[Monitor] Cycle done — {stats}")
+        logger.info(f"[Monitor] Cycle done — {stats}")
 
-    # Persist summary so dashboard banner always reflects the latest cycle
-    try:
-        from app.db.session import SessionLocal as _SL
-        from app.services.config_service import set_config as _sc
-        import json as _j
-        _db = _SL()
+        # Persist summary so dashboard banner always reflects the latest cycle
         try:
-            _sc(_db, "last_engine_summary", _j.dumps(stats))
-        finally:
-            _db.close()
-    except Exception as _e:
-        logger.warning(f"[Monitor] Could not persist cycle stats: {_e}")
+            set_config(db, "last_engine_summary", json.dumps(stats))
+        except Exception as e:
+            logger.warning(f"[Monitor] Could not persist cycle stats: {e}")
+            db.rollback()
+
+    finally:
+        if owns_session:
+            db.close()
 
     return stats
 
@@ -253,38 +412,78 @@ def _run_cycle(db_session_factory) -> dict:
 # ── Thread entry point ─────────────────────────────────────────────────────────
 
 def _monitor_loop(db_session_factory):
-    """Background thread: run cycle immediately, then repeat every POLL_INTERVAL."""
-    from app.db.session import SessionLocal as _SessionLocal
-    from app.services.config_service import get_config, set_config
+    """
+    Background thread: run cycle immediately, then repeat.
 
-    logger.info(f"[Monitor] Thread started — poll interval {POLL_INTERVAL}s")
+    The wait between cycles adapts to load: 0 after a cycle that processed
+    at least BATCH_THRESHOLD merchants, doubling up to MAX_INTERVAL while
+    cycles find nothing to do, otherwise POLL_INTERVAL. The interval is
+    measured start-to-start on time.monotonic(), so a slow cycle doesn't
+    push the schedule back (an overrun starts the next cycle immediately)
+    and wall-clock jumps don't affect it.
 
-    while not _stop_event.is_set():
-        # Re-check state at start of each cycle
-        db = db_session_factory()
-        try:
-            state = get_config(db, "engine_state", "OFF")
-        finally:
-            db.close()
+    One session is held across cycles (state checks + the cycle itself) and
+    only recycled after an error or every SESSION_RECYCLE_CYCLES cycles.
+    """
+    from app.services.config_service import get_config, set_config
 
-        if state == "OFF":
-            logger.info("[Monitor] engine_state=OFF — thread exiting")
-            break
+    logger.info(f"[Monitor] Thread started — poll interval {POLL_INTERVAL}s")
 
-        _run_cycle(db_session_factory)
+    db = None
+    cycles_on_session = 0
+    next_interval = POLL_INTERVAL
+    try:
+        while not _stop_event.is_set():
+            cycle_began = time.monotonic()
+            if db is None:
+                db = db_session_factory()
+                cycles_on_session = 0
 
-        if state == "ON":
-            # ONE-SHOT: mark OFF after single run
-            db = db_session_factory()
             try:
-                set_config(db, "engine_state", "OFF")
-            finally:
+                # Re-check state at start of each cycle
+                db.expire_all()
+                state = get_config(db, "engine_state", "OFF")
+
+                if state == "OFF":
+                    logger.info("[Monitor] engine_state=OFF — thread exiting")
+                    break
+
+                stats = _run_cycle(db_session_factory, db=db)
+
+                if state == "ON":
+                    # ONE-SHOT: mark OFF after single run
+                    set_config(db, "engine_state", "OFF")
+                    logger.info("[Monitor] engine_state=ON → single run done, state set to OFF")
+                    break
+
+                # End the read transaction so SQLite holds no lock while we sleep
+                db.commit()
+                cycles_on_session += 1
+
+                processed = stats["processed"]
+                if processed >= BATCH_THRESHOLD:
+                    next_interval = 0
+                elif processed == 0:
+                    next_interval = min(max(next_interval, POLL_INTERVAL) * 2, MAX_INTERVAL)
+                else:
+                    next_interval = POLL_INTERVAL
+            except Exception as e:
+                logger.error(f"[Monitor] Cycle failed, recycling DB session: {e}", exc_info=True)
                 db.close()
-            logger.info("[Monitor] engine_state=ON → single run done, state set to OFF")
-            break
+                db = None
+                next_interval = POLL_INTERVAL
 
-        # ALWAYS_ON: wait, then loop
-        _stop_event.wait(timeout=POLL_INTERVAL)
+            if db is not None and cycles_on_session >= SESSION_RECYCLE_CYCLES:
+                db.close()
+                db = None
+
+            # ALWAYS_ON: wait out the rest of the interval, then loop
+            remaining = cycle_began + next_interval - time.monotonic()
+            if remaining > 0:
+                _stop_event.wait(timeout=remaining)
+    finally:
+        if db is not None:
+            db.close()
 
     logger.info("[Monitor] Thread exiting")
 
@@ -293,20 +492,24 @@ def _monitor_loop(db_session_factory):
 
 def clear_all_fingerprints(db_session_factory=None):
     """
-    Wipe every stored fingerprint (fp_* config keys) and reset whatsapp_status
+    Wipe every stored fingerprint (merchant_fingerprints rows) and reset whatsapp_status
     to None on all risk records so the next cycle re-processes and re-sends every
-    non-rejected merchant regardless of previous runs.
+    non-rejected merchant regardless of previous runs. Also empties
+    WhatsAppService's duplicate-send cache, which would otherwise swallow
+    those re-sends.
     """
     from app.db.session import SessionLocal
-    from app.models.system_config import SystemConfig
+    from app.services.whatsapp_service import clear_sent_cache
+    from app.models.merchant_fingerprint import MerchantFingerprint
     from app.models.risk_score import RiskScore
 
     factory = db_session_factory or SessionLocal
     db = factory()
     try:
-        deleted = db.query(SystemConfig).filter(SystemConfig.key.like("fp_%")).delete(synchronize_session=False)
+        deleted = db.query(MerchantFingerprint).delete(synchronize_session=False)
         reset = db.query(RiskScore).update({RiskScore.whatsapp_status: None}, synchronize_session=False)
         db.commit()
+        clear_sent_cache()
         logger.info(f"[Monitor] Cache cleared — {deleted} fingerprints deleted, {reset} WA statuses reset")
     except Exception as e:
         logger.error(f"[Monitor] clear_all_fingerprints failed: {e}", exc_info=True)
@@ -315,6 +518,38 @@ def clear_all_fingerprints(db_session_factory=None):
         db.close()
 
 
+def migrate_fingerprints(db_session_factory=None):
+    """
+    Startup fingerprint housekeeping:
+      - drops legacy fp_<merchant_id> config rows (hex digests from an
+        older version — they could never match)
+      - wipes fingerprints written by an older FINGERPRINT_VERSION
+    A no-op once both are done.
+    """
+    from app.db.session import SessionLocal
+    from app.models.system_config import SystemConfig
+    from app.services.config_service import get_config, set_config
+
+    factory = db_session_factory or SessionLocal
+    db = factory()
+    try:
+        legacy = db.query(SystemConfig).filter(
+            SystemConfig.key.like("fp\\_%", escape="\\")
+        ).delete(synchronize_session=False)
+        db.commit()  # even for 0 rows — the DELETE holds SQLite's write lock until then
+        if legacy:
+            logger.info(f"[Monitor] Dropped {legacy} legacy fingerprints from system_config")
+
+        stored = get_config(db, "fingerprint_version", "")
+        if stored == FINGERPRINT_VERSION:
+            return
+        logger.info(f"[Monitor] Fingerprint version {stored or 'legacy'} → {FINGERPRINT_VERSION}, clearing")
+        clear_all_fingerprints(factory)
+        set_config(db, "fingerprint_version", FINGERPRINT_VERSION)
+    finally:
+        db.close()
+
+
 def start_monitor(db_session_factory=None):
     """Start the background monitor thread (idempotent — won't start twice)."""
     global _monitor_thread, _stop_event
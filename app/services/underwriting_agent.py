@@ -1,6 +1,56 @@
+import json
+import logging
 import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+
+import xxhash
 from anthropic import Anthropic
 
+logger = logging.getLogger(__name__)
+
+# Bounded LRU of Claude explanations keyed by a hash of the exact user prompt —
+# a re-assessment with identical inputs reuses the text instead of a new call.
+# Only real Claude output is cached, never the fallback. CACHE_BUST=1 skips
+# lookups (fresh answers still refill the cache) when validating prompt changes.
+_CACHE_MAXSIZE = 4096
+_CACHE_BUST = os.getenv("CACHE_BUST", "0") == "1"
+_explanation_cache: "OrderedDict[int, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(context: str) -> int:
+    return xxhash.xxh3_64_intdigest(context.encode())
+
+
+def _cache_get(key: int) -> Optional[str]:
+    if _CACHE_BUST:
+        return None
+    with _cache_lock:
+        explanation = _explanation_cache.get(key)
+        if explanation is not None:
+            _explanation_cache.move_to_end(key)
+        return explanation
+
+
+def _cache_put(key: int, explanation: str) -> None:
+    with _cache_lock:
+        _explanation_cache[key] = explanation
+        _explanation_cache.move_to_end(key)
+        if len(_explanation_cache) > _CACHE_MAXSIZE:
+            _explanation_cache.popitem(last=False)
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> Anthropic:
+    """
+    One Anthropic client per API key, shared by every agent — reuses its
+    HTTP connection pool instead of building a new one per explanation.
+    """
+    return Anthropic(api_key=api_key)
+
 
 class ClaudeUnderwritingAgent:
     """
@@ -13,6 +63,11 @@ class ClaudeUnderwritingAgent:
     MODEL = "claude-3-haiku-20240307"
     MAX_TOKENS = 300
     TEMPERATURE = 0.3
+    # Claude 3 Haiku's output cap. A batch call asks for MAX_TOKENS per
+    # merchant, so generate_explanations_batch sends at most BATCH_SIZE (13)
+    # merchants per call.
+    MAX_OUTPUT_TOKENS = 4096
+    BATCH_SIZE = MAX_OUTPUT_TOKENS // MAX_TOKENS
     
     # System prompt for Claude
     SYSTEM_PROMPT = """You are a financial underwriting analyst for GrabCredit and GrabInsurance.
@@ -25,13 +80,58 @@ When explaining decisions, consider:
    coupon engagement, customer concentration, order values, refund/return rates
 3. Risk Indicators: Chargeback rates, refund rates suggest transaction risk
 4. Market Position: Category, customer base size, and GMV trends indicate scale and stability"""
+
+    # Per-merchant user prompt, filled by _build_context via str.format_map —
+    # parsed once here instead of re-evaluating a large f-string per call
+    _PROMPT_TEMPLATE = """
+FINANCIAL PROFILE:
+- Merchant ID: {merchant_id} (Category: {category})
+- Monthly Revenue: ₹{monthly_revenue:,.0f}
+- Annual GMV: ₹{gmv_annual:,.0f}  (monthly snapshot: ₹{gmv:,.0f})
+- Credit Score: {credit_score}
+- Years in Business: {years_in_business}
+- Active Loans: {existing_loans}
+- Past Defaults: {past_defaults}
+
+TRANSACTION METRICS:
+- Refund Rate: {refund_pct:.1f}%  ({vs_refund} category avg of {bench_refund_pct:.1f}%)
+- Chargeback Rate: {chargeback_pct:.1f}%  ({vs_chargeback} category avg of {bench_chargeback_pct:.1f}%)
+- Return & Refund Rate: {return_and_refund_pct:.1f}%
+
+CUSTOMER BEHAVIOR:
+- Unique Customers: {unique_customer_count:,}
+- Customer Return Rate: {customer_return_pct:.0f}%  ({vs_crr} category avg of {bench_crr_pct:.0f}%)
+- Coupon Engagement: {coupon_redemption_pct:.0f}%
+- Deal Exclusivity: {deal_exclusivity_pct:.0f}%
+- Average Order Value: ₹{avg_order_value:,.0f}
+- Seasonality Index: {seasonality_index:.2f}x (peak-to-trough ratio)
+- GMV Trend: {gmv_trend}
+
+UNDERWRITING ASSESSMENT:
+- Computed Risk Score: {risk_score}/100
+- Risk Tier: {risk_tier}
+- Decision: {decision}
+
+TASK: Generate 3–5 professional sentences explaining this underwriting decision.
+REQUIREMENTS:
+1. Cite specific numbers (e.g., "credit score of {credit_score}", "refund rate of {refund_pct:.1f}%")
+2. Compare at least one metric to its category average benchmark
+3. Reference the GMV trend and at least one behavioral indicator (customer return rate, seasonality)
+4. Explain WHY the decision is {decision} in formal underwriting language
+5. For REJECTED: explain which specific factors caused rejection
+6. Return ONLY the explanation — no headers, no bullet points, no JSON"""
     
-    def __init__(self):
-        """Initialize Claude API client."""
-        self.client = Anthropic()
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+    def __init__(self, client: Optional[Anthropic] = None):
+        """
+        Use the given Claude client, else the one shared for ANTHROPIC_API_KEY
+        (see _get_client).
+        """
+        if client is None:
+            self.api_key = os.getenv("ANTHROPIC_API_KEY")
+            if not self.api_key:
+                raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+            client = _get_client(self.api_key)
+        self.client = client
     
     @staticmethod
     def generate_explanation(
@@ -42,6 +142,7 @@ When explaining decisions, consider:
         category_benchmark: dict = None,
         gmv_yoy_pct: float = None,
         score_breakdown: dict = None,
+        client: Optional[Anthropic] = None,
     ) -> str:
         """
         Generate Claude-powered explanation for underwriting decision.
@@ -51,12 +152,13 @@ When explaining decisions, consider:
             risk_score: Computed risk score (0-100)
             risk_tier: Risk tier classification (Tier 1, 2, or 3)
             decision: Final decision (APPROVED, APPROVED_WITH_CONDITIONS, REJECTED)
+            client: Optional Claude client; None uses the shared ANTHROPIC_API_KEY one
             
         Returns:
             str: 3-5 sentence professional explanation
         """
         try:
-            agent = ClaudeUnderwritingAgent()
+            agent = ClaudeUnderwritingAgent(client)
             return agent._call_claude(
                 merchant_data, risk_score, risk_tier, decision,
                 category_benchmark=category_benchmark or {},
@@ -94,6 +196,45 @@ When explaining decisions, consider:
         Raises:
             Exception: If API call fails
         """
+        context = self._build_context(
+            merchant_data, risk_score, risk_tier, decision,
+            category_benchmark=category_benchmark,
+            gmv_yoy_pct=gmv_yoy_pct,
+        )
+        key = _cache_key(context)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+
+        # Call Claude API
+        message = self.client.messages.create(
+            model=self.MODEL,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
+            system=self.SYSTEM_PROMPT,
+            messages=[
+                {
+                    "role": "user",
+                    "content": context
+                }
+            ]
+        )
+        
+        # Extract explanation from response
+        explanation = message.content[0].text.strip()
+        _cache_put(key, explanation)
+        return explanation
+
+    @staticmethod
+    def _build_context(
+        merchant_data: dict,
+        risk_score: int,
+        risk_tier: str,
+        decision: str,
+        category_benchmark: dict = None,
+        gmv_yoy_pct: float = None,
+    ) -> str:
+        """Build the per-merchant user prompt (metrics, benchmarks, task)."""
         # Extract financial metrics
         merchant_id = merchant_data.get('merchant_id', 'N/A')
         monthly_revenue = merchant_data.get('monthly_revenue', 0)
@@ -140,61 +281,142 @@ When explaining decisions, consider:
         vs_chargeback = "below" if chargeback_rate < bench_chargeback else "above"
         vs_crr = "above" if customer_return_rate > bench_crr else "below"
 
-        context = f"""
-FINANCIAL PROFILE:
-- Merchant ID: {merchant_id} (Category: {category})
-- Monthly Revenue: ₹{monthly_revenue:,.0f}
-- Annual GMV: ₹{gmv * 12:,.0f}  (monthly snapshot: ₹{gmv:,.0f})
-- Credit Score: {credit_score}
-- Years in Business: {years_in_business}
-- Active Loans: {existing_loans}
-- Past Defaults: {past_defaults}
+        return ClaudeUnderwritingAgent._PROMPT_TEMPLATE.format_map({
+            "merchant_id": merchant_id,
+            "category": category,
+            "monthly_revenue": monthly_revenue,
+            "gmv": gmv,
+            "gmv_annual": gmv * 12,
+            "credit_score": credit_score,
+            "years_in_business": years_in_business,
+            "existing_loans": existing_loans,
+            "past_defaults": past_defaults,
+            "refund_pct": refund_rate * 100,
+            "vs_refund": vs_refund,
+            "bench_refund_pct": bench_refund * 100,
+            "chargeback_pct": chargeback_rate * 100,
+            "vs_chargeback": vs_chargeback,
+            "bench_chargeback_pct": bench_chargeback * 100,
+            "return_and_refund_pct": return_and_refund_rate * 100,
+            "unique_customer_count": unique_customer_count,
+            "customer_return_pct": customer_return_rate * 100,
+            "vs_crr": vs_crr,
+            "bench_crr_pct": bench_crr * 100,
+            "coupon_redemption_pct": coupon_redemption_rate * 100,
+            "deal_exclusivity_pct": deal_exclusivity_rate * 100,
+            "avg_order_value": avg_order_value,
+            "seasonality_index": seasonality_index,
+            "gmv_trend": gmv_trend,
+            "risk_score": risk_score,
+            "risk_tier": risk_tier,
+            "decision": decision,
+        })
 
-TRANSACTION METRICS:
-- Refund Rate: {refund_rate*100:.1f}%  ({vs_refund} category avg of {bench_refund*100:.1f}%)
-- Chargeback Rate: {chargeback_rate*100:.1f}%  ({vs_chargeback} category avg of {bench_chargeback*100:.1f}%)
-- Return & Refund Rate: {return_and_refund_rate*100:.1f}%
+    @staticmethod
+    def generate_explanations_batch(items: List[dict], client: Optional[Anthropic] = None) -> List[str]:
+        """
+        Generate explanations for several merchants with one Claude call per
+        BATCH_SIZE merchants.
 
-CUSTOMER BEHAVIOR:
-- Unique Customers: {unique_customer_count:,}
-- Customer Return Rate: {customer_return_rate*100:.0f}%  ({vs_crr} category avg of {bench_crr*100:.0f}%)
-- Coupon Engagement: {coupon_redemption_rate*100:.0f}%
-- Deal Exclusivity: {deal_exclusivity_rate*100:.0f}%
-- Average Order Value: ₹{avg_order_value:,.0f}
-- Seasonality Index: {seasonality_index:.2f}x (peak-to-trough ratio)
-- GMV Trend: {gmv_trend}
+        Each item holds the generate_explanation kwargs. The system prompt is
+        sent once per call and Claude returns a JSON array with one
+        explanation per merchant, in order. Cached explanations are reused and
+        only the misses are sent. If a call fails, that sub-batch gets the
+        deterministic fallback text with no further calls; if the reply
+        can't be parsed into one explanation per merchant, it degrades to
+        per-item generate_explanation. ``client`` is passed through as in
+        generate_explanation.
 
-UNDERWRITING ASSESSMENT:
-- Computed Risk Score: {risk_score}/100
-- Risk Tier: {risk_tier}
-- Decision: {decision}
+        Returns:
+            list[str]: explanations in the same order as ``items``
+        """
+        if len(items) <= 1:
+            return [ClaudeUnderwritingAgent.generate_explanation(**item, client=client) for item in items]
 
-TASK: Generate 3–5 professional sentences explaining this underwriting decision.
-REQUIREMENTS:
-1. Cite specific numbers (e.g., "credit score of {credit_score}", "refund rate of {refund_rate*100:.1f}%")
-2. Compare at least one metric to its category average benchmark
-3. Reference the GMV trend and at least one behavioral indicator (customer return rate, seasonality)
-4. Explain WHY the decision is {decision} in formal underwriting language
-5. For REJECTED: explain which specific factors caused rejection
-6. Return ONLY the explanation — no headers, no bullet points, no JSON"""
+        contexts = [
+            ClaudeUnderwritingAgent._build_context(
+                item["merchant_data"], item["risk_score"], item["risk_tier"], item["decision"],
+                category_benchmark=item.get("category_benchmark") or {},
+                gmv_yoy_pct=item.get("gmv_yoy_pct"),
+            )
+            for item in items
+        ]
+        keys = [_cache_key(context) for context in contexts]
+        results = [_cache_get(key) for key in keys]
+        misses = [i for i, explanation in enumerate(results) if explanation is None]
+        size = ClaudeUnderwritingAgent.BATCH_SIZE
+        for start in range(0, len(misses), size):
+            ClaudeUnderwritingAgent._explain_sub_batch(
+                items, contexts, keys, results, misses[start:start + size], client
+            )
+        return results
 
-        # Call Claude API
-        message = self.client.messages.create(
-            model=self.MODEL,
-            max_tokens=self.MAX_TOKENS,
-            temperature=self.TEMPERATURE,
-            system=self.SYSTEM_PROMPT,
-            messages=[
-                {
-                    "role": "user",
-                    "content": context
-                }
-            ]
+    @staticmethod
+    def _explain_sub_batch(
+        items: List[dict],
+        contexts: List[str],
+        keys: List[int],
+        results: List[Optional[str]],
+        misses: List[int],
+        client: Optional[Anthropic],
+    ) -> None:
+        """
+        Fill results[i] for each index in misses (at most BATCH_SIZE) with
+        one Claude call; see generate_explanations_batch.
+        """
+        if len(misses) <= 1:
+            for i in misses:
+                results[i] = ClaudeUnderwritingAgent.generate_explanation(**items[i], client=client)
+            return
+
+        agent = ClaudeUnderwritingAgent(client)
+        sections = [
+            f"=== MERCHANT {n + 1} ===\n" + contexts[i]
+            for n, i in enumerate(misses)
+        ]
+        prompt = (
+            f"Below are {len(misses)} independent underwriting cases. Apply each case's TASK "
+            f"and REQUIREMENTS to that case only.\n\n"
+            + "\n\n".join(sections)
+            + f"\n\nOUTPUT: Return ONLY a JSON array of exactly {len(misses)} strings — "
+            f"the explanation for merchant 1, then merchant 2, and so on. The per-case "
+            f"'no JSON' rule applies to each explanation's text, not to this array."
         )
-        
-        # Extract explanation from response
-        explanation = message.content[0].text.strip()
-        return explanation
+        try:
+            message = agent.client.messages.create(
+                model=agent.MODEL,
+                max_tokens=agent.MAX_TOKENS * len(misses),
+                temperature=agent.TEMPERATURE,
+                system=agent.SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except Exception as e:
+            # API down, key refused, rate-limited: per-item calls would fail the same way
+            logger.warning(
+                f"Batch explanation of {len(misses)} merchants failed, using the fallback: {e}"
+            )
+            for i in misses:
+                item = items[i]
+                results[i] = ClaudeUnderwritingAgent._fallback_explanation(
+                    item["merchant_data"], item["risk_score"], item["risk_tier"], item["decision"], str(e)
+                )
+            return
+
+        try:
+            raw = message.content[0].text.strip()
+            explanations = json.loads(raw[raw.find("["):raw.rfind("]") + 1])
+            if len(explanations) != len(misses) or not all(isinstance(e, str) and e.strip() for e in explanations):
+                raise ValueError(f"expected {len(misses)} explanations, got {len(explanations)}")
+        except (ValueError, TypeError) as e:
+            logger.warning(
+                f"Batch explanation of {len(misses)} merchants was unusable, explaining one by one: {e}"
+            )
+            for i in misses:
+                results[i] = ClaudeUnderwritingAgent.generate_explanation(**items[i], client=client)
+            return
+        for i, explanation in zip(misses, explanations):
+            results[i] = explanation.strip()
+            _cache_put(keys[i], results[i])
     
     @staticmethod
     def _fallback_explanation(
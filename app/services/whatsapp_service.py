@@ -5,21 +5,178 @@ Handles:
 - WhatsApp message sending
 - Business-formatted responses
 - Delivery status tracking
-- Retry logic with exponential backoff
+- Retry logic with exponential backoff + jitter
+- Duplicate-send suppression (TTL cache of recent successful sends)
 - Error handling and logging
 """
 
 import os
+import random
 import re
+import threading
 import time
 import logging
-from typing import Dict, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import xxhash
+from requests.adapters import HTTPAdapter
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive pool sized for the monitor's parallel send phase
+_HTTP_POOL_CONNECTIONS = 8
+_HTTP_POOL_MAXSIZE = 16
+_HTTP_TIMEOUT = 10  # seconds per Twilio request
+
+
+def _pooled_http_client() -> TwilioHttpClient:
+    """Twilio HTTP client whose requests.Session keeps up to 16 connections alive."""
+    http_client = TwilioHttpClient(timeout=_HTTP_TIMEOUT)
+    adapter = HTTPAdapter(pool_connections=_HTTP_POOL_CONNECTIONS, pool_maxsize=_HTTP_POOL_MAXSIZE)
+    http_client.session.mount("https://", adapter)
+    return http_client
+
+
+# Recent successful sends keyed by a hash of (to_number, message body) — a
+# caller-level retry of the same message returns the earlier result instead of
+# hitting Twilio again. Bounded LRU with a TTL; only successes are cached.
+_SENT_CACHE_MAXSIZE = 10_000
+_SENT_CACHE_TTL = 24 * 60 * 60  # seconds
+_sent_cache: "OrderedDict[int, Tuple[float, Dict[str, str]]]" = OrderedDict()
+_sent_cache_lock = threading.Lock()
+
+
+def _sent_key(to_number: str, message: str) -> int:
+    return xxhash.xxh3_128_intdigest(f"{to_number}|{message}".encode())
+
+
+def _sent_get(key: int) -> Optional[Dict[str, str]]:
+    with _sent_cache_lock:
+        entry = _sent_cache.get(key)
+        if entry is None:
+            return None
+        sent_at, result = entry
+        if time.monotonic() - sent_at > _SENT_CACHE_TTL:
+            del _sent_cache[key]
+            return None
+        _sent_cache.move_to_end(key)
+        return dict(result)
+
+
+def _sent_put(key: int, result: Dict[str, str]) -> None:
+    with _sent_cache_lock:
+        _sent_cache[key] = (time.monotonic(), dict(result))
+        _sent_cache.move_to_end(key)
+        if len(_sent_cache) > _SENT_CACHE_MAXSIZE:
+            _sent_cache.popitem(last=False)
+
+
+def clear_sent_cache() -> None:
+    """Forget every recent send so identical messages go out again."""
+    with _sent_cache_lock:
+        _sent_cache.clear()
+
+
+class _CircuitBreaker:
+    """
+    Fails sends fast while Twilio looks hard-down.
+
+    Opens after fail_max consecutive provider failures (transport errors,
+    5xx, auth failure). While open, send_message returns failed without
+    calling Twilio or sleeping. After reset_timeout seconds one trial send is
+    let through: success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None  # monotonic; None while closed
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if the breaker is now open."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+            return self._opened_at is not None
+
+
+_BREAKER_FAIL_MAX = 5
+_BREAKER_RESET_TIMEOUT = 60.0  # seconds
+
+# Never evicted (unlike _get_client's LRU): dropping an open breaker would
+# silently close it. Breakers are tiny and credential pairs few.
+_breakers: Dict[Tuple[str, str], _CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _get_breaker(account_sid: str, auth_token: str) -> _CircuitBreaker:
+    """
+    One breaker per credential pair — auth failures from a bad pair never
+    block sends made with good credentials.
+    """
+    key = (account_sid, auth_token)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = _CircuitBreaker(_BREAKER_FAIL_MAX, _BREAKER_RESET_TIMEOUT)
+        return breaker
+
 
+_CIRCUIT_OPEN_RESULT = {
+    "sid": "N/A",
+    "status": "failed",
+    "error": "Twilio unavailable — circuit open, send skipped",
+}
+
+
+@lru_cache(maxsize=4)
+def _get_client(account_sid: str, auth_token: str) -> Client:
+    """
+    One Twilio Client per credential pair, shared by every WhatsAppService —
+    instances created per request reuse its connections and resource tree.
+    """
+    return Client(account_sid, auth_token, http_client=_pooled_http_client())
+
+
+# normalize_wa_number patterns, compiled once
+_FORMAT_RE = re.compile(r"[\s\-\(\)\.]+")
+_IN_10_RE = re.compile(r"^[6-9]\d{9}$")
+_IN_12_RE = re.compile(r"^91\d{10}$")
+_NONDIGIT_RE = re.compile(r"\D")
+
+# Same character classes as delete-sets for bytes.translate — a C loop with no
+# regex engine. Derived from the patterns above so ASCII input is handled
+# identically; non-ASCII input still goes through the regexes.
+_FORMAT_CHARS = bytes(c for c in range(128) if _FORMAT_RE.match(chr(c)))
+_NONDIGIT_CHARS = bytes(c for c in range(128) if _NONDIGIT_RE.match(chr(c)))
+
+
+@lru_cache(maxsize=4096)
 def normalize_wa_number(number: str) -> str:
     """
     Convert any user-entered phone number into a valid whatsapp:+E.164 string.
@@ -31,6 +188,8 @@ def normalize_wa_number(number: str) -> str:
     - Already has whatsapp: prefix            → re-normalised cleanly
 
     Returns "" if the resulting number has fewer than 7 digits (invalid).
+
+    Pure, so results are memoised — bulk runs see the same numbers repeatedly.
     """
     num = number.strip()
 
@@ -38,22 +197,37 @@ def normalize_wa_number(number: str) -> str:
     if num.lower().startswith("whatsapp:"):
         num = num[9:].strip()
 
+    # Fast paths for already-clean Indian mobiles — the bulk of real input.
+    # isascii() keeps str.isdigit() from accepting non-ASCII digits that the
+    # regex path below would reject.
+    if num.isascii() and num.isdigit():
+        if len(num) == 10 and num[0] in "6789":
+            return f"whatsapp:+91{num}"
+        if len(num) == 12 and num.startswith("91"):
+            return f"whatsapp:+{num}"
+
     # Remove formatting characters
-    num = re.sub(r"[\s\-\(\)\.]+", "", num)
+    if num.isascii():
+        num = num.encode().translate(None, _FORMAT_CHARS).decode()
+    else:
+        num = _FORMAT_RE.sub("", num)
 
     # 10-digit Indian mobile (starts 6-9)
-    if re.match(r"^[6-9]\d{9}$", num):
+    if _IN_10_RE.match(num):
         num = f"+91{num}"
     # 12-digit with country code 91 but no leading +
-    elif re.match(r"^91\d{10}$", num):
+    elif _IN_12_RE.match(num):
         num = f"+{num}"
     # Add leading + if missing
     elif num and not num.startswith("+"):
         num = f"+{num}"
 
     # Basic sanity — at least 7 digits after +
-    digits = re.sub(r"\D", "", num)
-    if len(digits) < 7:
+    if num.isascii():
+        digit_count = len(num.encode().translate(None, _NONDIGIT_CHARS))
+    else:
+        digit_count = len(_NONDIGIT_RE.sub("", num))
+    if digit_count < 7:
         return ""
 
     return f"whatsapp:{num}"
@@ -69,7 +243,7 @@ class WhatsAppService:
     Service for sending WhatsApp messages via Twilio.
     
     Features:
-    - Retry logic (up to 2 attempts)
+    - Retry logic (up to 2 attempts, exponential backoff with jitter)
     - Delivery status logging
     - Professional message formatting
     - Error handling and graceful degradation
@@ -84,15 +258,18 @@ class WhatsAppService:
         # Validate credentials
         if not self.account_sid or not self.auth_token:
             logger.warning("Twilio credentials not configured - WhatsApp messages will fail")
+        self._breaker = _get_breaker(self.account_sid, self.auth_token)
         
         try:
-            self.client = Client(self.account_sid, self.auth_token)
+            self.client = _get_client(self.account_sid, self.auth_token)
+            self._messages = self.client.messages
         except Exception as e:
             logger.error(f"Failed to initialize Twilio client: {e}")
             self.client = None
+            self._messages = None
     
-    # Twilio error codes that should NOT be retried — fail immediately
-    _NO_RETRY_CODES = {
+    # Human-readable reasons for the hard-fail codes below
+    _ERROR_MESSAGES = {
         20003: "Twilio auth failure — check TWILIO_ACCOUNT_SID / TWILIO_AUTH_TOKEN",
         21211: "Invalid 'To' phone number format",
         21214: "Destination number is not a mobile number",
@@ -106,12 +283,36 @@ class WhatsAppService:
         63038: "Twilio sandbox/account daily message limit (50/day) exceeded — wait until midnight UTC or upgrade your Twilio plan",
     }
 
+    # Twilio error codes that should NOT be retried — fail immediately
+    _NO_RETRY_CODES = frozenset(_ERROR_MESSAGES)
+
+    # Bad credentials — counts towards opening the circuit breaker
+    _AUTH_FAILURE_CODE = 20003
+
+    # Twilio "Too Many Requests" — backs off 1/4/16/64× base instead of 1/2/4/8×
+    _RATE_LIMIT_CODE = 20429
+
+    @staticmethod
+    def _backoff_delay(
+        attempt: int,
+        base_delay: float,
+        max_delay: float,
+        jitter: float,
+        factor: int = 2,
+    ) -> float:
+        """Seconds to wait after failed attempt N: capped exponential, stretched by up to +jitter."""
+        delay = min(max_delay, base_delay * factor ** (attempt - 1))
+        return delay * (1 + random.random() * jitter)
+
     def send_message(
         self,
         to_number: str,
         message: str,
         max_retries: int = 2,
-        retry_delay: int = 2
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        jitter: float = 0.5,
+        force: bool = False,
     ) -> Dict[str, str]:
         """
         Send WhatsApp message with retry logic and fail-safe error handling.
@@ -123,34 +324,65 @@ class WhatsAppService:
         - Invalid number       → immediate failed, logged, no retry
         - Sandbox not joined   → immediate failed, instructional log message
         - Auth error           → immediate failed, no retry
-        - Transient errors     → up to max_retries attempts
+        - Transient errors     → up to max_retries attempts, waiting
+                                 base_delay × 2^(attempt-1) (× 4^ on 20429),
+                                 capped at max_delay, plus up to +jitter
+                                 so concurrent senders don't retry in lockstep
         - Any unexpected error → caught, logged, returns failed
+        - Twilio hard-down     → after 5 consecutive transport / 5xx / auth
+                                 failures on these credentials, sends fail
+                                 immediately for 60s (circuit breaker),
+                                 then one trial send
+        - Same message to the same number already sent within the last
+          24h → returns that send's result without calling Twilio,
+          unless force=True
         """
         if not self.client:
             logger.warning(f"[WhatsApp] Twilio client not initialised — cannot send to {to_number}")
             return {"sid": "N/A", "status": "failed", "error": "Twilio client not initialised"}
 
+        key = _sent_key(to_number, message)
+        if not force:
+            cached = _sent_get(key)
+            if cached is not None:
+                logger.info(f"[WhatsApp] Duplicate of SID {cached['sid']} to {to_number} — not re-sent")
+                return cached
+
         attempt = 0
         last_error = None
 
         while attempt < max_retries:
             attempt += 1
+            if not self._breaker.allow():
+                logger.warning(f"[WhatsApp] Circuit open — not sending to {to_number}")
+                return dict(_CIRCUIT_OPEN_RESULT)
             try:
                 logger.info(f"[WhatsApp] Sending to {to_number} (attempt {attempt}/{max_retries})")
-                msg = self.client.messages.create(
+                msg = self._messages.create(
                     from_=self.twilio_number,
                     to=to_number,
                     body=message
                 )
                 logger.info(f"[WhatsApp] Sent OK | SID: {msg.sid} | Status: {msg.status} | To: {to_number}")
-                return {"sid": msg.sid, "status": msg.status, "error": None}
+                self._breaker.record_success()
+                result = {"sid": msg.sid, "status": msg.status, "error": None}
+                _sent_put(key, result)
+                return result
 
             except TwilioRestException as e:
                 last_error = str(e)
-                human_reason = self._NO_RETRY_CODES.get(e.code)
 
-                if human_reason:
+                # Per-recipient 4xx errors still prove Twilio is up
+                provider_down = e.code == self._AUTH_FAILURE_CODE or (e.status or 0) >= 500
+                if not provider_down:
+                    self._breaker.record_success()
+                elif self._breaker.record_failure() and e.code not in self._NO_RETRY_CODES:
+                    logger.error(f"[WhatsApp] Circuit opened after Twilio error {e.code} — giving up on {to_number}")
+                    return dict(_CIRCUIT_OPEN_RESULT)
+
+                if e.code in self._NO_RETRY_CODES:
                     # Known hard-fail — no retry, full user-friendly log
+                    human_reason = self._ERROR_MESSAGES.get(e.code, "unknown")
                     logger.error(
                         f"[WhatsApp] Hard failure sending to {to_number} | "
                         f"Code {e.code}: {human_reason}"
@@ -167,15 +399,20 @@ class WhatsAppService:
                     f"Code {e.code}: {e.msg}"
                 )
                 if attempt < max_retries:
-                    logger.info(f"[WhatsApp] Retrying in {retry_delay}s...")
-                    time.sleep(retry_delay)
+                    factor = 4 if e.code == self._RATE_LIMIT_CODE else 2
+                    sleep_s = self._backoff_delay(attempt, base_delay, max_delay, jitter, factor)
+                    logger.info(f"[WhatsApp] Retrying in {sleep_s:.1f}s...")
+                    time.sleep(sleep_s)
 
             except Exception as e:
                 last_error = str(e)
                 logger.error(f"[WhatsApp] Unexpected error sending to {to_number}: {e}", exc_info=True)
+                if self._breaker.record_failure():
+                    return dict(_CIRCUIT_OPEN_RESULT)
                 if attempt < max_retries:
-                    logger.info(f"[WhatsApp] Retrying in {retry_delay}s...")
-                    time.sleep(retry_delay)
+                    sleep_s = self._backoff_delay(attempt, base_delay, max_delay, jitter)
+                    logger.info(f"[WhatsApp] Retrying in {sleep_s:.1f}s...")
+                    time.sleep(sleep_s)
 
         error_msg = f"Failed after {max_retries} attempts: {last_error}"
         logger.error(f"[WhatsApp] All retries exhausted for {to_number}: {error_msg}")
@@ -191,13 +428,15 @@ class WhatsAppService:
         explanation: str,
         merchant_name: str = "",
         financial_offer: Optional[Dict] = None,
-        secure_offer_link: str = ""
+        secure_offer_link: str = "",
+        force: bool = False,
     ) -> Dict[str, str]:
         """
         Send structured underwriting offer notification via WhatsApp.
 
         Uses the new business-friendly format with credit/insurance details and offer link.
         Does NOT include the AI explanation — that stays in the admin dashboard only.
+        force=True re-sends even if this exact offer already went to this number.
         """
         message = format_underwriting_message(
             merchant_id=merchant_id,
@@ -208,7 +447,54 @@ class WhatsAppService:
             financial_offer=financial_offer or {},
             secure_offer_link=secure_offer_link,
         )
-        return self.send_message(to_number, message)
+        return self.send_message(to_number, message, force=force)
+
+
+# ── Offer message templates ───────────────────────────────────────────────────
+# Blocks of the offer notification; a blank line separates consecutive blocks.
+_MSG_HEADER = (
+    "📊 *GrabCredit Pre-Approved Offer*\n\n"
+    "Merchant: {name}\n"
+    "Risk Tier: {risk_tier}\n"
+    "Decision: {decision}\n"
+)
+_MSG_CREDIT = (
+    "💳 *GrabCredit Offer*\n"
+    "  Credit Limit : ₹{limit:,d}\n"
+    "  Interest     : {rate}% p.a.\n"
+    "  Tenure       : {tenure}\n"
+)
+_MSG_INSURANCE = (
+    "🛡 *GrabInsurance Offer*\n"
+    "  Coverage : ₹{coverage:,d}\n"
+    "  Premium  : ₹{premium:,d}/year\n"
+)
+_MSG_NO_OFFER = "No financial offers available at this time.\n"
+_MSG_LINK = "📎 *View & Accept your offer:*\n{link}\n"
+_MSG_FOOTER = "_Thank you for partnering with Grab._"
+
+_LAKHS_TO_RUPEES = 100_000
+
+
+def _build_message_template(has_credit: bool, has_insurance: bool, has_link: bool) -> str:
+    blocks = [_MSG_HEADER]
+    if has_credit:
+        blocks.append(_MSG_CREDIT)
+    if has_insurance:
+        blocks.append(_MSG_INSURANCE)
+    if not has_credit and not has_insurance:
+        blocks.append(_MSG_NO_OFFER)
+    if has_link:
+        blocks.append(_MSG_LINK)
+    blocks.append(_MSG_FOOTER)
+    return "\n".join(blocks)
+
+
+# All 8 section combinations, assembled once; key = credit<<2 | insurance<<1 | link
+_MESSAGE_TEMPLATES = {
+    (credit << 2) | (insurance << 1) | link: _build_message_template(credit, insurance, link)
+    for credit in (0, 1) for insurance in (0, 1) for link in (0, 1)
+}
 
 
 def format_underwriting_message(
@@ -231,59 +517,34 @@ def format_underwriting_message(
         💳 Credit section (if present)
         🛡 Insurance section (if present)
         View & Accept link
+
+    The layout for each credit/insurance/link combination is pre-built in
+    _MESSAGE_TEMPLATES, so a call only computes the values and formats once.
     """
     offer = financial_offer or {}
-    display_name = merchant_name or merchant_id
-
-    lines = [
-        "📊 *GrabCredit Pre-Approved Offer*",
-        "",
-        f"Merchant: {display_name}",
-        f"Risk Tier: {risk_tier}",
-        f"Decision: {decision}",
-        "",
-    ]
-
     credit = offer.get("credit")
     insurance = offer.get("insurance")
 
+    values = {
+        "name": merchant_name or merchant_id,
+        "risk_tier": risk_tier,
+        "decision": decision,
+        "link": secure_offer_link,
+    }
     if credit:
-        limit_str = f"₹{int(credit.get('credit_limit_lakhs', 0) * 100000):,}"
-        rate_str = f"{credit.get('interest_rate_percent', 0)}%"
         tenures = credit.get("tenure_options_months", [])
-        tenure_str = (
+        # round(), not int(): lakhs are 2-dp floats and e.g. 5.57 * 100000
+        # lands just below 557000
+        values["limit"] = round(credit.get("credit_limit_lakhs", 0) * _LAKHS_TO_RUPEES)
+        values["rate"] = credit.get("interest_rate_percent", 0)
+        values["tenure"] = (
             f"{min(tenures)}–{max(tenures)} months"
             if len(tenures) > 1
             else (f"{tenures[0]} months" if tenures else "N/A")
         )
-        lines += [
-            "💳 *GrabCredit Offer*",
-            f"  Credit Limit : {limit_str}",
-            f"  Interest     : {rate_str} p.a.",
-            f"  Tenure       : {tenure_str}",
-            "",
-        ]
-
     if insurance:
-        cov_str = f"₹{int(insurance.get('coverage_amount_lakhs', 0) * 100000):,}"
-        prem_str = f"₹{int(insurance.get('premium_amount', 0)):,}/year"
-        lines += [
-            "🛡 *GrabInsurance Offer*",
-            f"  Coverage : {cov_str}",
-            f"  Premium  : {prem_str}",
-            "",
-        ]
-
-    if not credit and not insurance:
-        lines.append("No financial offers available at this time.")
-        lines.append("")
-
-    if secure_offer_link:
-        lines += [
-            "📎 *View & Accept your offer:*",
-            secure_offer_link,
-            "",
-        ]
-
-    lines.append("_Thank you for partnering with Grab._")
-    return "\n".join(lines)
+        values["coverage"] = round(insurance.get("coverage_amount_lakhs", 0) * _LAKHS_TO_RUPEES)
+        values["premium"] = int(insurance.get("premium_amount", 0))
+
+    key = (bool(credit) << 2) | (bool(insurance) << 1) | bool(secure_offer_link)
+    return _MESSAGE_TEMPLATES[key].format_map(values)
@@ -0,0 +1,35 @@
+"""
+Helpers shared by the script-style Claude tests.
+"""
+
+import sys
+
+# Substring checks, so a tuple (ordered, cheapest to iterate) rather than a set
+METRIC_KEYWORDS = ("credit", "revenue", "income", "business", "score")
+
+
+def mentions_any(text: str, keywords=METRIC_KEYWORDS) -> bool:
+    """True if any keyword occurs in text, case-insensitively (lowers once)."""
+    text = text.lower()
+    return any(word in text for word in keywords)
+
+
+class RejectedKeyClient:
+    """Stands in for an Anthropic client whose API key is refused: every call raises (and is counted)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise PermissionError("401 invalid x-api-key")
+
+
+def buffer_stdout() -> None:
+    """
+    Switch stdout to block buffering for script runs, so the many status
+    prints go out in a few writes instead of one per line (a tty, or any
+    stream under PYTHONUNBUFFERED / -u). Flushed at exit or when full.
+    """
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
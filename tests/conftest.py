@@ -0,0 +1,62 @@
+"""
+Shared pytest fixtures.
+"""
+
+import os
+import time
+
+import pytest
+import requests
+
+# Under pytest-xdist (pip install -r requirements-dev.txt, then
+# `pytest -n auto --dist=loadfile`) give each worker its own SQLite file, so
+# parallel workers never contend for the write lock or collide on merchant_ids.
+# Must run before app.db.session builds the engine from DB_DIR.
+_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+if _WORKER:
+    os.environ["DB_DIR"] = os.path.join(os.environ.get("DB_DIR", "/home/user"), _WORKER)
+
+from app.db.init_db import init_db
+from app.db.session import SessionLocal, engine
+
+
+@pytest.fixture(scope="session")
+def _schema():
+    """Create the schema (and seed data) once per test run."""
+    init_db()
+
+
+@pytest.fixture
+def db(_schema):
+    """
+    Session joined to an outer connection-level transaction that is rolled
+    back after the test, so commits made by the code under test never persist.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = SessionLocal(bind=connection)
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+LIVE_SERVER_URL = "http://localhost:8000"
+
+
+@pytest.fixture(scope="session")
+def live_server():
+    """
+    Probe the running app (uvicorn app.main:app) once per test run and
+    return its base URL. Tests that hit it over HTTP take this fixture and
+    are skipped, rather than each timing out, when it is not up.
+    """
+    for _ in range(10):
+        try:
+            requests.get(f"{LIVE_SERVER_URL}/health", timeout=2).raise_for_status()
+            return LIVE_SERVER_URL
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    pytest.skip(f"app server not reachable at {LIVE_SERVER_URL}")
@@ -5,11 +5,45 @@ Tests with proper timeout and ASCII output only
 
 import os
 import json
+import random
 import requests
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tests._helpers import buffer_stdout, mentions_any
 
 BASE_URL = "http://localhost:8000/api"
 
+# One keep-alive session shared by every request in this script. The adapter
+# retries overloaded/5xx responses (incl. Anthropic's 529) honouring
+# Retry-After; connection refusals get only 2 tries so a stopped server fails
+# fast. Read timeouts are left to _post's jittered retry.
+session = requests.Session()
+session.mount("http://", HTTPAdapter(
+    pool_connections=8, pool_maxsize=8,
+    max_retries=Retry(
+        total=5, connect=2, read=False, backoff_factor=2,
+        status_forcelist=[429, 500, 502, 503, 504, 529],
+        allowed_methods=["GET", "POST"],
+        respect_retry_after_header=True,
+    ),
+))
+
+_POST_ATTEMPTS = 5
+
+
+def _post(url, **kwargs):
+    """session.post, retrying timeouts after random(2, 4) × attempt seconds."""
+    for attempt in range(1, _POST_ATTEMPTS + 1):
+        try:
+            return session.post(url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError):
+            if attempt == _POST_ATTEMPTS:
+                raise
+            time.sleep(random.uniform(2, 4) * attempt)
+
+
 # Test merchant profiles
 TEST_MERCHANTS = {
     "strong_merchant": {
@@ -50,17 +84,18 @@ def check_explanation_quality(explanation, merchant_name, decision):
     """Check explanation quality - returns pass/fail"""
     print(f"\n   Explanation: {explanation[:150]}...")
     
+    length = len(explanation)
     checks = {
-        "has_content": len(explanation) > 50,
-        "mentions_metrics": any(word in explanation.lower() for word in ["credit", "revenue", "income", "business", "score"]),
-        "professional": len(explanation) > 100,
+        "has_content": length > 50,
+        "mentions_metrics": mentions_any(explanation),
+        "professional": length > 100,
     }
     
     passed = all(checks.values())
     print(f"   Checks: Content={checks['has_content']}, Metrics={checks['mentions_metrics']}, Professional={checks['professional']}")
     return passed
 
-def test_with_live_api():
+def test_with_live_api(live_server):
     """Test with real Claude API"""
     print("\n" + "="*70)
     print("TESTING WITH LIVE CLAUDE API")
@@ -68,40 +103,44 @@ def test_with_live_api():
     
     results = []
     
-    for merchant_name, merchant_data in TEST_MERCHANTS.items():
+    # One batch call — the four merchants share a single Claude round-trip
+    batch = []
+    try:
+        response = _post(
+            f"{BASE_URL}/underwrite/batch",
+            json=list(TEST_MERCHANTS.values()),
+            timeout=30  # Longer timeout for Claude API
+        )
+        response.raise_for_status()
+        batch = response.json()
+        error = None
+    except requests.exceptions.Timeout:
+        print(f"\n  ERROR: Request timeout (API slow or unreachable)")
+        error = "timeout"
+    except requests.exceptions.ConnectionError:
+        print(f"\n  ERROR: Connection refused")
+        error = "connection"
+    except Exception as e:
+        print(f"\n  ERROR: {str(e)}")
+        error = str(e)
+    
+    if error:
+        results = [{"merchant": merchant_name, "error": error} for merchant_name in TEST_MERCHANTS]
+    
+    for merchant_name, result in zip(TEST_MERCHANTS, batch):
         print(f"\nMerchant: {merchant_name}")
+        print(f"  Status: OK")
+        print(f"  Decision: {result['decision']}")
+        print(f"  Risk Tier: {result['risk_tier']}")
+        print(f"  Risk Score: {result['risk_score']}")
         
-        try:
-            response = requests.post(
-                f"{BASE_URL}/underwrite", 
-                json=merchant_data, 
-                timeout=30  # Longer timeout for Claude API
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"  Status: OK")
-            print(f"  Decision: {result['decision']}")
-            print(f"  Risk Tier: {result['risk_tier']}")
-            print(f"  Risk Score: {result['risk_score']}")
-            
-            passed = check_explanation_quality(result['explanation'], merchant_name, result['decision'])
-            results.append({
-                "merchant": merchant_name,
-                "decision": result['decision'],
-                "passed": passed,
-                "explanation": result['explanation']
-            })
-            
-        except requests.exceptions.Timeout:
-            print(f"  ERROR: Request timeout (API slow or unreachable)")
-            results.append({"merchant": merchant_name, "error": "timeout"})
-        except requests.exceptions.ConnectionError:
-            print(f"  ERROR: Connection refused")
-            results.append({"merchant": merchant_name, "error": "connection"})
-        except Exception as e:
-            print(f"  ERROR: {str(e)}")
-            results.append({"merchant": merchant_name, "error": str(e)})
+        passed = check_explanation_quality(result['explanation'], merchant_name, result['decision'])
+        results.append({
+            "merchant": merchant_name,
+            "decision": result['decision'],
+            "passed": passed,
+            "explanation": result['explanation']
+        })
     
     # Summary
     print("\n" + "="*70)
@@ -111,19 +150,20 @@ def test_with_live_api():
     
     return results
 
-def test_with_broken_key():
-    """Test fallback when API key is broken"""
+def test_with_broken_key(live_server):
+    """
+    Test fallback when API key is broken. The key is the server's — start it
+    with an invalid ANTHROPIC_API_KEY to exercise this; setting it in this
+    process never reached the server.
+    """
     print("\n" + "="*70)
     print("TESTING FALLBACK WITH BROKEN API KEY")
     print("="*70)
     
-    original_key = os.environ.get("ANTHROPIC_API_KEY", "")
-    os.environ["ANTHROPIC_API_KEY"] = "fake_key_invalid"
-    
     merchant = TEST_MERCHANTS["strong_merchant"]
     
     try:
-        response = requests.post(
+        response = _post(
             f"{BASE_URL}/underwrite",
             json=merchant,
             timeout=30
@@ -144,21 +184,18 @@ def test_with_broken_key():
     except Exception as e:
         print(f"ERROR: System crashed with broken key: {e}")
         return False
-    finally:
-        # Restore key
-        if original_key:
-            os.environ["ANTHROPIC_API_KEY"] = original_key
 
 if __name__ == "__main__":
+    buffer_stdout()
     print("\n" + "="*70)
     print("PHASE 4: CLAUDE INTEGRATION TEST SUITE (SIMPLIFIED)")
     print("="*70)
     
     # Check server is running
     try:
-        response = requests.get(f"{BASE_URL}/docs", timeout=10)
+        response = session.get(f"{BASE_URL}/docs", timeout=10)
         print("\n[OK] Server is running")
-    except:
+    except requests.exceptions.RequestException:
         print("\n[ERROR] Server not accessible on http://localhost:8000")
         print("Please start it first: uvicorn app.main:app --reload")
         exit(1)
@@ -171,8 +208,9 @@ if __name__ == "__main__":
     
     # Run tests
     print("\n" + "="*70)
-    test_results = test_with_live_api()
-    fallback_test = test_with_broken_key()
+    # Server reachability was checked above; live_server is pytest's fixture
+    test_results = test_with_live_api(None)
+    fallback_test = test_with_broken_key(None)
     
     print("\n" + "="*70)
     print("FINAL SUMMARY")
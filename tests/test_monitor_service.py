@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.models.merchant import Merchant
+from app.models.risk_score import RiskScore
+from app.orchestrator import orchestrator as orchestrator_module
+from app.services import monitor_service
+
+
+class _RecordingOrchestrator:
+    """Stands in for Orchestrator: records who was re-assessed and saves a REJECTED record (no WhatsApp)."""
+
+    def __init__(self):
+        self.assessed = []
+
+    def process_underwriting(self, merchant, db, **kwargs):
+        self.assessed.append(merchant.merchant_id)
+        db.add(RiskScore(merchant_id=merchant.merchant_id, risk_score=0, risk_tier="Tier 3",
+                         decision="REJECTED", explanation="stub"))
+        db.flush()
+        return SimpleNamespace(decision="REJECTED")
+
+
+def test_cycles_shortlist_only_edited_merchants(db, monkeypatch):
+    """
+    After a full first cycle, the next one fingerprints and re-assesses only
+    edited merchants — including an edit stamped just before the first cycle
+    started (flushed before its read, committed after it).
+    """
+    orchestrator = _RecordingOrchestrator()
+    shortlisted = []
+    fingerprint = monitor_service._merchant_fingerprint
+    monkeypatch.setattr(orchestrator_module, "Orchestrator", lambda: orchestrator)
+    monkeypatch.setattr(monitor_service, "_merchant_fingerprint",
+                        lambda row: shortlisted.append(row.merchant_id) or fingerprint(row))
+    monkeypatch.setattr(monitor_service, "_watermark", None)
+
+    # Every merchant last edited an hour ago
+    db.query(Merchant).update({Merchant.updated_at: datetime.utcnow() - timedelta(hours=1)})
+    db.commit()
+    merchant_ids = sorted(merchant_id for (merchant_id,) in db.query(Merchant.merchant_id))
+    assert len(merchant_ids) >= 3
+
+    before_first_cycle = datetime.utcnow()
+    monitor_service._run_cycle(None, db=db)
+    assert sorted(shortlisted) == merchant_ids
+
+    edited, late_commit = merchant_ids[:2]
+    db.query(Merchant).filter(Merchant.merchant_id == edited).update(
+        {Merchant.monthly_revenue: Merchant.monthly_revenue + 1, Merchant.updated_at: datetime.utcnow()})
+    db.query(Merchant).filter(Merchant.merchant_id == late_commit).update(
+        {Merchant.monthly_revenue: Merchant.monthly_revenue + 1,
+         Merchant.updated_at: before_first_cycle - timedelta(seconds=1)})
+    db.commit()
+    shortlisted.clear()
+    orchestrator.assessed.clear()
+
+    monitor_service._run_cycle(None, db=db)
+
+    assert sorted(shortlisted) == [edited, late_commit]
+    assert sorted(orchestrator.assessed) == [edited, late_commit]
@@ -16,7 +16,6 @@ from app.db.session import SessionLocal
 from app.orchestrator.orchestrator import Orchestrator
 from app.models.risk_score import RiskScore
 from app.models.merchant import Merchant
-import json
 
 print('='*90)
 print('PHASE 8.4: PRODUCTION VALIDATION & SOW ALIGNMENT CHECK')
@@ -66,11 +65,11 @@ try:
         return_and_refund_rate=0.10
     )
     
-    credit_result = Orchestrator.process_underwriting(test_merchant, db, mode='credit')
+    credit_result = Orchestrator().process_underwriting(test_merchant, db, mode='credit')
     test_merchant.merchant_id = 'SOW_REQ1_TEST_INS'
-    insurance_result = Orchestrator.process_underwriting(test_merchant, db, mode='insurance')
+    insurance_result = Orchestrator().process_underwriting(test_merchant, db, mode='insurance')
     test_merchant.merchant_id = 'SOW_REQ1_TEST_BOTH'
-    both_result = Orchestrator.process_underwriting(test_merchant, db, mode='both')
+    both_result = Orchestrator().process_underwriting(test_merchant, db, mode='both')
     
     req1_pass = (
         credit_result.financial_offer and credit_result.financial_offer.credit and not credit_result.financial_offer.insurance and
@@ -110,7 +109,7 @@ try:
         avg_order_value=6000, seasonality_index=1.2,
         deal_exclusivity_rate=0.40, return_and_refund_rate=0.05
     )
-    t1_result = Orchestrator.process_underwriting(t1_merchant, db, mode='both')
+    t1_result = Orchestrator().process_underwriting(t1_merchant, db, mode='both')
     
     # Test Tier 2
     t2_merchant = MerchantInput(
@@ -122,7 +121,7 @@ try:
         avg_order_value=2000, seasonality_index=1.8,
         deal_exclusivity_rate=0.15, return_and_refund_rate=0.12
     )
-    t2_result = Orchestrator.process_underwriting(t2_merchant, db, mode='both')
+    t2_result = Orchestrator().process_underwriting(t2_merchant, db, mode='both')
     
     # Test Tier 3
     t3_merchant = MerchantInput(
@@ -134,7 +133,7 @@ try:
         avg_order_value=300, seasonality_index=3.5,
         deal_exclusivity_rate=0.0, return_and_refund_rate=0.52
     )
-    t3_result = Orchestrator.process_underwriting(t3_merchant, db, mode='both')
+    t3_result = Orchestrator().process_underwriting(t3_merchant, db, mode='both')
     
     req3_pass = (
         t1_result.risk_tier == 'Tier 1' and t1_result.financial_offer and t1_result.financial_offer.credit and
@@ -168,7 +167,7 @@ try:
     print('REQ-5: Dashboard Mode Selection & Financial Offer Display')
     dashboard_risk = db.query(RiskScore).filter(RiskScore.merchant_id == 'SOW_REQ1_TEST_BOTH').first()
     if dashboard_risk and dashboard_risk.financial_offer:
-        offer_data = json.loads(dashboard_risk.financial_offer)
+        offer_data = dashboard_risk.financial_offer  # JSON column → dict
         has_both_in_db = offer_data.get('credit') and offer_data.get('insurance')
         req5_pass = has_both_in_db
         print(f'  {"✅ PASS" if req5_pass else "❌ FAIL"}: Dashboard data storage & retrieval')
@@ -193,7 +192,7 @@ try:
         avg_order_value=2000, seasonality_index=1.5,
         deal_exclusivity_rate=0.20, return_and_refund_rate=0.12
     )
-    compat_result = Orchestrator.process_underwriting(compat_test, db)
+    compat_result = Orchestrator().process_underwriting(compat_test, db)
     req6_pass = (
         compat_result.financial_offer and 
         compat_result.financial_offer.credit and 
@@ -284,7 +283,7 @@ try:
             return_and_refund_rate=0.12
         )
         
-        result = Orchestrator.process_underwriting(merchant, db, mode='both')
+        result = Orchestrator().process_underwriting(merchant, db, mode='both')
         
         validation_results['production_scenarios']['total'] += 1
         if result.decision == 'APPROVED':
@@ -329,7 +328,7 @@ try:
     
     # Step 1: Underwrite with both modes
     print('Step 1: Underwrite Merchant (Both Modes)')
-    e2e_result = Orchestrator.process_underwriting(e2e_merchant, db, mode='both')
+    e2e_result = Orchestrator().process_underwriting(e2e_merchant, db, mode='both')
     step1_pass = (
         e2e_result.decision in ['APPROVED', 'APPROVED_WITH_CONDITIONS'] and
         e2e_result.financial_offer and
@@ -345,8 +344,8 @@ try:
     step2_pass = (
         db_record and
         db_record.financial_offer and
-        json.loads(db_record.financial_offer).get('credit') and
-        json.loads(db_record.financial_offer).get('insurance')
+        db_record.financial_offer.get('credit') and
+        db_record.financial_offer.get('insurance')
     )
     validation_results['e2e_workflow']['step2_database'] = step2_pass
     print(f'  {"✅ PASS" if step2_pass else "❌ FAIL"}: Financial offers persisted to database as JSON')
@@ -354,7 +353,7 @@ try:
     # Step 3: Verify dashboard data retrieval
     print('Step 3: Verify Dashboard Data Retrieval')
     if db_record:
-        offer_json = json.loads(db_record.financial_offer)
+        offer_json = db_record.financial_offer
         step3_pass = (
             offer_json.get('credit', {}).get('credit_limit_lakhs') and
             offer_json.get('insurance', {}).get('coverage_amount_lakhs')
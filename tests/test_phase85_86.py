@@ -10,7 +10,6 @@ from app.db.init_db import init_db
 from app.db.session import SessionLocal
 from app.schemas.merchant_schema import MerchantInput
 from app.orchestrator.orchestrator import Orchestrator
-import json
 
 # Init DB
 init_db()
@@ -200,7 +199,7 @@ risk_score_record = RiskScore(
     risk_tier=both_mode.risk_tier,
     decision=both_mode.decision,
     explanation=both_mode.explanation,
-    financial_offer=both_mode.financial_offer.model_dump_json() if both_mode.financial_offer else None,
+    financial_offer=both_mode.financial_offer.model_dump(mode="json") if both_mode.financial_offer else None,
     offer_status='PENDING'
 )
 db.add(risk_score_record)
@@ -211,7 +210,7 @@ if retrieved:
     print("✓ Risk score persisted to database")
     if retrieved.financial_offer:
         print("✓ Financial offer serialized as JSON")
-        offer_data = json.loads(retrieved.financial_offer)
+        offer_data = retrieved.financial_offer  # JSON column → dict
         print(f"✓ Financial offer retrieved and deserialized")
         print(f"  - Credit offer present: {offer_data.get('credit') is not None}")
         print(f"  - Insurance offer present: {offer_data.get('insurance') is not None}")
@@ -11,148 +11,159 @@ Tests:
 7. Accept/Reject buttons present
 """
 
-from app.db.init_db import init_db
-from app.db.session import SessionLocal
 from app.models.merchant import Merchant
 from app.models.risk_score import RiskScore
 from app.schemas.merchant_schema import MerchantInput
 from app.orchestrator.orchestrator import Orchestrator
-import json
-
-print("=" * 70)
-print("PHASE 8.6.1 TEST: Public Secure Merchant Offer Page")
-print("=" * 70)
-print()
-
-# Initialize DB
-init_db()
-db = SessionLocal()
-
-print("STEP 1: Create test merchant (auto-generate secure_token)")
-print("-" * 70)
-
-merchant_data = {
-    'merchant_id': 'TEST_8_6_1',
-    'monthly_revenue': 100000,
-    'credit_score': 750,
-    'years_in_business': 5,
-    'existing_loans': 2,
-    'past_defaults': 0,
-    'chargeback_rate': 0.005,
-    'category': 'Electronics',
-    'monthly_gmv_12m': [50000, 55000, 60000, 65000, 70000, 75000, 80000, 85000, 90000, 95000, 100000, 110000],
-    'coupon_redemption_rate': 0.25,
-    'unique_customer_count': 500,
-    'customer_return_rate': 0.15,
-    'avg_order_value': 2500,
-    'seasonality_index': 1.2,
-    'deal_exclusivity_rate': 0.30,
-    'return_and_refund_rate': 0.08
-}
-
-merchant_input = MerchantInput(**merchant_data)
-
-# Create merchant
-orchestrator = Orchestrator()
-result = orchestrator.process_underwriting(merchant_input, db, None, "both")
-
-# Get merchant from DB
-merchant = db.query(Merchant).filter(Merchant.merchant_id == 'TEST_8_6_1').first()
-
-if merchant:
-    print(f"✓ Merchant created: {merchant.merchant_id}")
-    if merchant.secure_token:
-        print(f"✓ secure_token auto-generated: {merchant.secure_token}")
-        secure_token = merchant.secure_token
+
+
+def test_public_offer_page(db):
+    """Token generation, latest-score lookup and token lookup (db: rolled-back session from conftest)"""
+    print("=" * 70)
+    print("PHASE 8.6.1 TEST: Public Secure Merchant Offer Page")
+    print("=" * 70)
+    print()
+
+    print("STEP 1: Create test merchant (auto-generate secure_token)")
+    print("-" * 70)
+
+    merchant_data = {
+        'merchant_id': 'TEST_8_6_1',
+        'monthly_revenue': 100000,
+        'credit_score': 750,
+        'years_in_business': 5,
+        'existing_loans': 2,
+        'past_defaults': 0,
+        'chargeback_rate': 0.005,
+        'category': 'Electronics',
+        'monthly_gmv_12m': [50000, 55000, 60000, 65000, 70000, 75000, 80000, 85000, 90000, 95000, 100000, 110000],
+        'coupon_redemption_rate': 0.25,
+        'unique_customer_count': 500,
+        'customer_return_rate': 0.15,
+        'avg_order_value': 2500,
+        'seasonality_index': 1.2,
+        'deal_exclusivity_rate': 0.30,
+        'return_and_refund_rate': 0.08
+    }
+
+    merchant_input = MerchantInput(**merchant_data)
+
+    # Create merchant
+    orchestrator = Orchestrator()
+    result = orchestrator.process_underwriting(merchant_input, db, None, "both")
+
+    # Get merchant and its latest risk score from DB in one query
+    merchant, risk_score = (
+        db.query(Merchant, RiskScore)
+        .outerjoin(RiskScore, RiskScore.merchant_id == Merchant.merchant_id)
+        .filter(Merchant.merchant_id == 'TEST_8_6_1')
+        .order_by(RiskScore.id.desc())
+        .first()
+    ) or (None, None)
+
+    if merchant:
+        print(f"✓ Merchant created: {merchant.merchant_id}")
+        if merchant.secure_token:
+            print(f"✓ secure_token auto-generated: {merchant.secure_token}")
+            secure_token = merchant.secure_token
+        else:
+            print("✗ secure_token NOT generated!")
+            secure_token = None
     else:
-        print("✗ secure_token NOT generated!")
+        print("✗ Merchant creation failed!")
         secure_token = None
-else:
-    print("✗ Merchant creation failed!")
-    secure_token = None
 
-print()
+    print()
+
+    print("STEP 2: Verify merchant has risk score and offers")
+    print("-" * 70)
 
-print("STEP 2: Verify merchant has risk score and offers")
-print("-" * 70)
+    if risk_score:
+        print(f"✓ Risk score: {risk_score.risk_score}")
+        print(f"✓ Risk tier: {risk_score.risk_tier}")
+        print(f"✓ Decision: {risk_score.decision}")
+    
+        financial_offer = risk_score.financial_offer or {}  # JSON column → dict
+        if financial_offer.get('credit'):
+            print(f"✓ Credit offer present: ₹{financial_offer['credit'].get('credit_limit_lakhs')}L")
+        if financial_offer.get('insurance'):
+            print(f"✓ Insurance offer present: ₹{financial_offer['insurance'].get('coverage_amount_lakhs')}L")
+        print()
+    else:
+        print("✗ Risk score not found!")
+        print()
 
-risk_score = db.query(RiskScore).filter(
-    RiskScore.merchant_id == 'TEST_8_6_1'
-).order_by(RiskScore.id.desc()).first()
+    print("STEP 3: Test token-based lookup")
+    print("-" * 70)
 
-if risk_score:
-    print(f"✓ Risk score: {risk_score.risk_score}")
-    print(f"✓ Risk tier: {risk_score.risk_tier}")
-    print(f"✓ Decision: {risk_score.decision}")
+    if secure_token:
+        merchant_by_token = db.query(Merchant).filter(
+            Merchant.secure_token == secure_token
+        ).first()
     
-    if risk_score.financial_offer:
-        try:
-            financial_offer = json.loads(risk_score.financial_offer)
-            if financial_offer.get('credit'):
-                print(f"✓ Credit offer present: ₹{financial_offer['credit'].get('credit_limit_lakhs')}L")
-            if financial_offer.get('insurance'):
-                print(f"✓ Insurance offer present: ₹{financial_offer['insurance'].get('coverage_amount_lakhs')}L")
-        except:
-            print("✗ Could not parse financial_offer JSON")
-    print()
-else:
-    print("✗ Risk score not found!")
+        if merchant_by_token:
+            print(f"✓ Merchant lookup by token successful")
+            print(f"  Merchant ID: {merchant_by_token.merchant_id}")
+            print(f"  Category: {merchant_by_token.category}")
+            print(f"  Credit Score: {merchant_by_token.credit_score}")
+        else:
+            print("✗ Token lookup failed!")
+    else:
+        print("✗ No secure_token to test!")
+
     print()
 
-print("STEP 3: Test token-based lookup")
-print("-" * 70)
+    print("STEP 4: Test invalid token returns None")
+    print("-" * 70)
 
-if secure_token:
-    merchant_by_token = db.query(Merchant).filter(
-        Merchant.secure_token == secure_token
+    fake_token = "00000000-0000-0000-0000-000000000000"
+    invalid_merchant = db.query(Merchant).filter(
+        Merchant.secure_token == fake_token
     ).first()
-    
-    if merchant_by_token:
-        print(f"✓ Merchant lookup by token successful")
-        print(f"  Merchant ID: {merchant_by_token.merchant_id}")
-        print(f"  Category: {merchant_by_token.category}")
-        print(f"  Credit Score: {merchant_by_token.credit_score}")
+
+    if invalid_merchant is None:
+        print(f"✓ Invalid token correctly returns None (404 behavior)")
     else:
-        print("✗ Token lookup failed!")
-else:
-    print("✗ No secure_token to test!")
-
-print()
-
-print("STEP 4: Test invalid token returns None")
-print("-" * 70)
-
-fake_token = "00000000-0000-0000-0000-000000000000"
-invalid_merchant = db.query(Merchant).filter(
-    Merchant.secure_token == fake_token
-).first()
-
-if invalid_merchant is None:
-    print(f"✓ Invalid token correctly returns None (404 behavior)")
-else:
-    print(f"✗ Invalid token returned a merchant (should be None)")
-
-print()
-
-print("STEP 5: Route Integration Check")
-print("-" * 70)
-
-print("The route GET /offer/{secure_token} is set up to:")
-print("  ✓ Accept secure_token parameter")
-print("  ✓ Lookup merchant by token")
-print("  ✓ Fetch latest risk score")
-print("  ✓ Parse JSON financial_offer")
-print("  ✓ Render public_offer.html template")
-print("  ✓ Return 404 if token invalid")
-print()
-
-print("=" * 70)
-print("PHASE 8.6.1: ALL CHECKS PASSED ✅")
-print("=" * 70)
-print()
-
-if secure_token:
-    print(f"Test URL: http://localhost:8000/offer/{secure_token}")
+        print(f"✗ Invalid token returned a merchant (should be None)")
+
+    print()
+
+    print("STEP 5: Route Integration Check")
+    print("-" * 70)
+
+    print("The route GET /offer/{secure_token} is set up to:")
+    print("  ✓ Accept secure_token parameter")
+    print("  ✓ Lookup merchant by token")
+    print("  ✓ Fetch latest risk score")
+    print("  ✓ Read financial_offer (JSON column)")
+    print("  ✓ Render public_offer.html template")
+    print("  ✓ Return 404 if token invalid")
+    print()
+
+    assert secure_token, "secure_token was not generated"
+    assert risk_score is not None, "risk score not found"
+    assert merchant_by_token is not None, "token lookup failed"
+    assert invalid_merchant is None, "invalid token returned a merchant"
+
+    print("=" * 70)
+    print("PHASE 8.6.1: ALL CHECKS PASSED ✅")
+    print("=" * 70)
     print()
 
-print("Next: Implement 8.6.2 - Admin Dashboard Enhancement")
+    if secure_token:
+        print(f"Test URL: http://localhost:8000/offer/{secure_token}")
+        print()
+
+    print("Next: Implement 8.6.2 - Admin Dashboard Enhancement")
+
+
+if __name__ == "__main__":
+    from app.db.init_db import init_db
+    from app.db.session import SessionLocal
+
+    init_db()
+    db = SessionLocal()
+    try:
+        test_public_offer_page(db)
+    finally:
+        db.close()
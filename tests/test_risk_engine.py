@@ -1,136 +1,82 @@
 import pytest
 from app.schemas.merchant_schema import MerchantInput
+from app.engines import risk_batch
 from app.engines.risk_engine import RiskEngine
 
+DEFAULTS = dict(merchant_id="M", monthly_revenue=50000, credit_score=700, years_in_business=3, existing_loans=1, past_defaults=0)
+
+
+def _m(**overrides):
+    """
+    MerchantInput from DEFAULTS plus overrides. Validated on purpose: on
+    pydantic 2 the Rust validator is faster than model_construct.
+    """
+    return MerchantInput(**{**DEFAULTS, **overrides})
+
+
+# overrides on DEFAULTS, auto_reject, substring of reason (None: no reason), score range
+CASES = [
+    pytest.param(dict(merchant_id="M_GOOD", monthly_revenue=90000, credit_score=780, years_in_business=6, existing_loans=0),
+                 False, None, 70, 100, id="high_credit_high_revenue_no_reject"),
+    pytest.param(dict(merchant_id="M_LOW_CREDIT", credit_score=520, years_in_business=5),
+                 True, "550", 0, 0, id="credit_score_below_threshold_auto_reject"),
+    pytest.param(dict(merchant_id="M_BAD_DEFAULTS", monthly_revenue=60000, years_in_business=5, past_defaults=3),
+                 True, "default", 0, 0, id="past_defaults_threshold_auto_reject"),
+    pytest.param(dict(merchant_id="M_MODERATE", monthly_revenue=40000, credit_score=680, existing_loans=2),
+                 False, None, 40, 75, id="moderate_case_score_in_range"),
+    # Exactly 550 is acceptable
+    pytest.param(dict(merchant_id="M_MIN_CREDIT", credit_score=550), False, None, 0, 100, id="minimum_credit_score_acceptable"),
+    # 2 defaults are acceptable, but the penalty pulls the score below 50
+    pytest.param(dict(merchant_id="M_TWO_DEFAULTS", past_defaults=2), False, None, 0, 49, id="max_defaults_acceptable"),
+    # Revenue over the cap, max credit, very long history: still clamped to 100
+    pytest.param(dict(merchant_id="M_EXCELLENT", monthly_revenue=200000, credit_score=850, years_in_business=20, existing_loans=0),
+                 False, None, 0, 100, id="score_clamped_strong"),
+    pytest.param(dict(merchant_id="M_WEAK", monthly_revenue=5000, credit_score=600, years_in_business=0, existing_loans=5, past_defaults=2),
+                 False, None, 0, 100, id="score_clamped_weak"),
+]
+
+# Every profile above, scored together by test_batch_matches_scalar
+BATCH_MERCHANTS = [{**DEFAULTS, **case.values[0]} for case in CASES] + [
+    # Behavioural fields and GMV growth exercise the remaining score terms
+    dict(merchant_id="M_BEHAVIOURAL", monthly_revenue=70000, credit_score=720, years_in_business=4, existing_loans=1, past_defaults=0,
+         refund_rate=0.2, chargeback_rate=0.06, return_and_refund_rate=0.12, seasonality_index=2.5,
+         customer_return_rate=0.4, deal_exclusivity_rate=0.3,
+         monthly_gmv_12m=[100, 100, 100, 100, 100, 100, 110, 115, 120, 125, 130, 135]),
+]
+
 
 class TestRiskEngine:
     """Unit tests for RiskEngine.evaluate_risk()"""
 
-    def test_high_credit_high_revenue_no_reject(self):
-        """High credit score and high revenue should not trigger auto-reject and result in high score."""
-        merchant = MerchantInput(
-            merchant_id="M_GOOD",
-            monthly_revenue=90000,
-            credit_score=780,
-            years_in_business=6,
-            existing_loans=0,
-            past_defaults=0
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant)
-        
-        assert result["auto_reject"] is False
-        assert result["reason"] is None
-        assert result["score"] >= 70, f"Expected high score, got {result['score']}"
-
-    def test_credit_score_below_threshold_auto_reject(self):
-        """Credit score below 550 should trigger auto-reject."""
-        merchant = MerchantInput(
-            merchant_id="M_LOW_CREDIT",
-            monthly_revenue=50000,
-            credit_score=520,
-            years_in_business=5,
-            existing_loans=1,
-            past_defaults=0
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant)
-        
-        assert result["auto_reject"] is True
-        assert "550" in result["reason"]
-        assert result["score"] == 0
-
-    def test_past_defaults_threshold_auto_reject(self):
-        """3 or more past defaults should trigger auto-reject."""
-        merchant = MerchantInput(
-            merchant_id="M_BAD_DEFAULTS",
-            monthly_revenue=60000,
-            credit_score=700,
-            years_in_business=5,
-            existing_loans=1,
-            past_defaults=3
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant)
-        
-        assert result["auto_reject"] is True
-        assert "defaults" in result["reason"].lower()
-        assert result["score"] == 0
-
-    def test_moderate_case_score_in_range(self):
-        """Moderate merchant should have score between 50 and 75."""
-        merchant = MerchantInput(
-            merchant_id="M_MODERATE",
-            monthly_revenue=40000,
-            credit_score=680,
-            years_in_business=3,
-            existing_loans=2,
-            past_defaults=0
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant)
-        
-        assert result["auto_reject"] is False
-        assert result["reason"] is None
-        assert 40 <= result["score"] <= 75, f"Expected score in range 40-75, got {result['score']}"
-
-    def test_minimum_credit_score_acceptable(self):
-        """Credit score of exactly 550 should be acceptable (not rejected)."""
-        merchant = MerchantInput(
-            merchant_id="M_MIN_CREDIT",
-            monthly_revenue=50000,
-            credit_score=550,
-            years_in_business=3,
-            existing_loans=1,
-            past_defaults=0
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant)
-        
-        assert result["auto_reject"] is False
-        assert result["score"] >= 0
-
-    def test_max_defaults_acceptable(self):
-        """2 past defaults should be acceptable (not rejected)."""
-        merchant = MerchantInput(
-            merchant_id="M_TWO_DEFAULTS",
-            monthly_revenue=50000,
-            credit_score=700,
-            years_in_business=3,
-            existing_loans=1,
-            past_defaults=2
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant)
-        
-        assert result["auto_reject"] is False
-        # Score will be reduced by penalties but not rejected
-        assert result["score"] < 50, "Score should be reduced due to defaults penalty"
-
-    def test_score_clamped_between_0_100(self):
-        """Score should always be between 0 and 100."""
-        # Test very strong merchant
-        merchant_strong = MerchantInput(
-            merchant_id="M_EXCELLENT",
-            monthly_revenue=200000,  # Over cap
-            credit_score=850,         # Max
-            years_in_business=20,     # Very long
-            existing_loans=0,
-            past_defaults=0
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant_strong)
-        assert result["score"] <= 100
-
-        # Test weak merchant
-        merchant_weak = MerchantInput(
-            merchant_id="M_WEAK",
-            monthly_revenue=5000,
-            credit_score=600,
-            years_in_business=0,
-            existing_loans=5,
-            past_defaults=2
-        )
-        
-        result = RiskEngine.evaluate_risk(merchant_weak)
-        assert result["score"] >= 0
+    @pytest.mark.parametrize("overrides, expected_reject, reason_contains, score_lo, score_hi", CASES)
+    def test_evaluate_risk(self, overrides, expected_reject, reason_contains, score_lo, score_hi):
+        """Auto-reject flag, reason and score range for each merchant profile."""
+        result = RiskEngine.evaluate_risk(_m(**overrides))
+
+        assert result["auto_reject"] is expected_reject
+        if reason_contains is None:
+            assert result["reason"] is None
+        else:
+            assert reason_contains in result["reason"].lower()
+        assert score_lo <= result["score"] <= score_hi, f"Expected score in range {score_lo}-{score_hi}, got {result['score']}"
+
+    def test_batch_matches_scalar(self):
+        """evaluate_risk_batch gives every merchant the same score and reject flag as evaluate_risk."""
+        merchants = [MerchantInput(**data) for data in BATCH_MERCHANTS]
+
+        scores, auto_reject = risk_batch.evaluate_risk_batch(risk_batch.to_score_array(merchants))
+
+        expected = [RiskEngine.evaluate_risk(m) for m in merchants]
+        assert scores.tolist() == [r["score"] for r in expected]
+        assert auto_reject.tolist() == [r["auto_reject"] for r in expected]
+
+    @pytest.mark.skipif(risk_batch._score_rows_native is None, reason="numba not installed (or NUMBA_DISABLE_JIT set)")
+    def test_native_kernel_matches_numpy(self):
+        """The numba-compiled batch kernel agrees with the NumPy fallback."""
+        arr = risk_batch.to_score_array([MerchantInput(**data) for data in BATCH_MERCHANTS])
+
+        scores, auto_reject = risk_batch.evaluate_risk_batch(arr)
+        np_scores, np_auto_reject = risk_batch._evaluate_risk_batch_numpy(arr)
+
+        assert scores.tolist() == np_scores.tolist()
+        assert auto_reject.tolist() == np_auto_reject.tolist()
@@ -9,29 +9,48 @@ import sys
 
 sys.path.insert(0, '/mnt/c/MyFiles/My_Projects/grabon-assignment')
 
-def test_failure_safety():
-    """Test fallback behavior when API fails"""
-    from app.orchestrator.orchestrator import Orchestrator
-    from app.db.session import SessionLocal, engine
-    from app.db.base import Base
-    from app.schemas.merchant_schema import MerchantInput
-    
-    # Initialize DB
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    
-    db = SessionLocal()
-    orchestrator = Orchestrator()
-    
-    merchant_data = {
+from app.orchestrator.orchestrator import Orchestrator
+from app.schemas.merchant_schema import MerchantInput
+from tests._helpers import RejectedKeyClient, buffer_stdout
+
+TEST_MERCHANTS = {
+    "fallback": {
         "merchant_id": "TEST_FALLBACK_001",
         "monthly_revenue": 50000,
         "credit_score": 780,
         "years_in_business": 5,
         "existing_loans": 1,
         "past_defaults": 0
-    }
-    merchant_input = MerchantInput(**merchant_data)
+    },
+    "recovery": {
+        "merchant_id": "TEST_FALLBACK_002",
+        "monthly_revenue": 15000,
+        "credit_score": 550,
+        "years_in_business": 2,
+        "existing_loans": 1,
+        "past_defaults": 0
+    },
+    "restored": {
+        "merchant_id": "TEST_RESTORED_001",
+        "monthly_revenue": 25000,
+        "credit_score": 700,
+        "years_in_business": 3,
+        "existing_loans": 2,
+        "past_defaults": 0
+    },
+}
+
+
+# Validated once at import, shared by every run of the test
+MERCHANT_INPUTS = {name: MerchantInput(**data) for name, data in TEST_MERCHANTS.items()}
+_ORCH = Orchestrator()
+# Broken client injected, not os.environ — nothing leaks to other tests/workers
+_BROKEN_ORCH = Orchestrator(anthropic_client=RejectedKeyClient())
+
+def test_failure_safety(db):
+    """Test fallback behavior when API fails (db: rolled-back session from conftest)"""
+    orchestrator = _BROKEN_ORCH
+    merchant_input = MERCHANT_INPUTS["fallback"]
     
     print("="*70)
     print("STEP 7: VERIFY FAILURE SAFETY")
@@ -42,7 +61,6 @@ def test_failure_safety():
     print("-"*70)
     
     original_key = os.environ.get("ANTHROPIC_API_KEY", "")
-    os.environ["ANTHROPIC_API_KEY"] = "fake_key_invalid_12345"
     
     try:
         decision = orchestrator.process_underwriting(merchant_input, db)
@@ -76,15 +94,7 @@ def test_failure_safety():
     print("-"*70)
     
     # Try again with broken key - should still work
-    merchant_data2 = {
-        "merchant_id": "TEST_FALLBACK_002",
-        "monthly_revenue": 15000,
-        "credit_score": 550,
-        "years_in_business": 2,
-        "existing_loans": 1,
-        "past_defaults": 0
-    }
-    merchant_input2 = MerchantInput(**merchant_data2)
+    merchant_input2 = MERCHANT_INPUTS["recovery"]
     
     try:
         decision2 = orchestrator.process_underwriting(merchant_input2, db)
@@ -96,26 +106,17 @@ def test_failure_safety():
         print(f"       Error: {type(e).__name__}: {str(e)[:100]}")
         test2_passed = False
     
-    # Test 3: Restore API key and try again (if key was originally set)
+    # Test 3: Default client for the configured key (if one is set)
     print("\nTest 3: API Key Restoration")
     print("-"*70)
     
-    if original_key and original_key != "":
-        os.environ["ANTHROPIC_API_KEY"] = original_key
-        print(f"[INFO] Original API key restored")
+    if original_key:
+        print(f"[INFO] Using the configured API key")
         
-        merchant_data3 = {
-            "merchant_id": "TEST_RESTORED_001",
-            "monthly_revenue": 25000,
-            "credit_score": 700,
-            "years_in_business": 3,
-            "existing_loans": 2,
-            "past_defaults": 0
-        }
-        merchant_input3 = MerchantInput(**merchant_data3)
+        merchant_input3 = MERCHANT_INPUTS["restored"]
         
         try:
-            decision3 = orchestrator.process_underwriting(merchant_input3, db)
+            decision3 = _ORCH.process_underwriting(merchant_input3, db)
             print(f"[OK] System works with restored API key")
             print(f"     Decision: {decision3.decision}")
             
@@ -131,7 +132,6 @@ def test_failure_safety():
             test3_passed = False
     else:
         print(f"[SKIP] No original API key to restore (not configured)")
-        os.environ["ANTHROPIC_API_KEY"] = ""
         test3_passed = True  # Skip doesn't count as failure
     
     # Final Summary
@@ -155,16 +155,20 @@ def test_failure_safety():
         if not test3_passed and original_key:
             print("  ✗ System didn't work with restored key")
         return False
-    
-    db.close()
 
 if __name__ == "__main__":
+    buffer_stdout()
+    from app.db.init_db import init_db
+    from app.db.session import SessionLocal
+    
     print("\n" + "="*70)
     print("PHASE 4 FINAL: STEP 7 - FAILURE SAFETY")
     print("="*70 + "\n")
     
+    init_db()
+    db = SessionLocal()
     try:
-        success = test_failure_safety()
+        success = test_failure_safety(db)
         
         print("\n" + "="*70)
         print("PHASE 4 COMPLETE")
@@ -188,3 +192,5 @@ if __name__ == "__main__":
         print(f"\n[CRITICAL ERROR] {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        db.close()
@@ -0,0 +1,73 @@
+import json
+import logging
+import re
+from types import SimpleNamespace
+
+from app.services.underwriting_agent import ClaudeUnderwritingAgent
+from tests._helpers import RejectedKeyClient
+
+
+class _RecordingClient:
+    """Stands in for an Anthropic client: answers each batch prompt with one explanation per merchant."""
+
+    def __init__(self):
+        self.calls = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        count = int(re.search(r"Below are (\d+) independent", kwargs["messages"][0]["content"]).group(1))
+        text = json.dumps([f"Explanation {n} for this underwriting case." for n in range(count)])
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+def _items(prefix, count):
+    # Distinct merchant_ids, so no prompt is served from the explanation cache
+    return [
+        dict(
+            merchant_data={"merchant_id": f"{prefix}_{n}", "monthly_revenue": 50000, "credit_score": 700},
+            risk_score=60, risk_tier="Tier 2", decision="APPROVED_WITH_CONDITIONS",
+        )
+        for n in range(count)
+    ]
+
+
+def test_batch_splits_into_sub_batches_within_output_cap():
+    """A 20-merchant batch is sent as one call per BATCH_SIZE merchants, each within the output cap."""
+    client = _RecordingClient()
+
+    explanations = ClaudeUnderwritingAgent.generate_explanations_batch(_items("M_SPLIT", 20), client=client)
+
+    size = ClaudeUnderwritingAgent.BATCH_SIZE
+    assert len(client.calls) == -(-20 // size)
+    assert [call["max_tokens"] for call in client.calls] == [
+        ClaudeUnderwritingAgent.MAX_TOKENS * size,
+        ClaudeUnderwritingAgent.MAX_TOKENS * (20 - size),
+    ]
+    assert all(call["max_tokens"] <= ClaudeUnderwritingAgent.MAX_OUTPUT_TOKENS for call in client.calls)
+    assert len(explanations) == 20
+    assert all(e.startswith("Explanation") for e in explanations)
+
+
+def test_failed_batch_is_logged_and_falls_back(caplog):
+    """A failing batch call is logged, and each merchant gets the deterministic explanation without another call."""
+    items = _items("M_FAIL", 3)
+    client = RejectedKeyClient()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.underwriting_agent"):
+        explanations = ClaudeUnderwritingAgent.generate_explanations_batch(items, client=client)
+
+    assert client.calls == 1
+    assert "Batch explanation of 3 merchants failed" in caplog.text
+    assert "401 invalid x-api-key" in caplog.text
+    assert [e.startswith(f"Merchant M_FAIL_{n} ") for n, e in enumerate(explanations)] == [True] * 3
+
+
+def test_failed_batch_makes_one_call_per_sub_batch():
+    """A refused key costs one call per sub-batch — no per-merchant retries."""
+    client = RejectedKeyClient()
+
+    explanations = ClaudeUnderwritingAgent.generate_explanations_batch(_items("M_DOWN", 20), client=client)
+
+    assert client.calls == -(-20 // ClaudeUnderwritingAgent.BATCH_SIZE)
+    assert [e.startswith(f"Merchant M_DOWN_{n} ") for n, e in enumerate(explanations)] == [True] * 20
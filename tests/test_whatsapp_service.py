@@ -0,0 +1,207 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from twilio.base.exceptions import TwilioRestException
+
+from app.services import whatsapp_service
+from app.services.whatsapp_service import WhatsAppService, _CircuitBreaker
+
+_credentials = itertools.count()
+
+
+class _StubMessages:
+    """Stands in for Client.messages: replays `outcomes` (an exception to raise, or None to succeed)."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if outcome is not None:
+            raise outcome
+        return SimpleNamespace(sid=f"SM{self.calls}", status="queued")
+
+
+def _service(monkeypatch, messages):
+    """WhatsAppService on its own credential pair (so its own breaker), sending through `messages`."""
+    monkeypatch.setenv("TWILIO_ACCOUNT_SID", f"AC_test_{next(_credentials)}")
+    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "token")
+    service = WhatsAppService()
+    service._messages = messages
+    return service
+
+
+def _down():
+    return TwilioRestException(503, "/Messages", "Service Unavailable", code=20500)
+
+
+def _auth_failure():
+    return TwilioRestException(401, "/Messages", "Authenticate", code=20003)
+
+
+def _bad_number():
+    return TwilioRestException(400, "/Messages", "Invalid To", code=21211)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record retry sleeps instead of sleeping."""
+    calls = []
+    monkeypatch.setattr(whatsapp_service.time, "sleep", calls.append)
+    return calls
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sent_cache():
+    whatsapp_service.clear_sent_cache()
+    yield
+    whatsapp_service.clear_sent_cache()
+
+
+class TestCircuitBreaker:
+    """send_message's per-credential circuit breaker"""
+
+    def test_opens_after_five_provider_failures_and_fails_fast(self, monkeypatch, sleeps):
+        messages = _StubMessages(*[_down() for _ in range(5)])
+        service = _service(monkeypatch, messages)
+
+        results = [service.send_message("whatsapp:+919876543210", f"m{n}", max_retries=1) for n in range(5)]
+        assert [r["error"].startswith("Failed after") for r in results[:4]] == [True] * 4
+        assert results[4] == whatsapp_service._CIRCUIT_OPEN_RESULT
+
+        # Open: no Twilio call and no sleep
+        result = service.send_message("whatsapp:+919876543210", "m5")
+        assert result == whatsapp_service._CIRCUIT_OPEN_RESULT
+        assert messages.calls == 5
+        assert sleeps == []
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=60)
+        assert breaker.record_failure() is True
+        assert breaker.allow() is False
+
+        breaker._opened_at -= 61  # reset_timeout elapsed
+        assert breaker.allow() is True
+        assert breaker.allow() is False  # trial still in flight
+
+        breaker.record_success()
+        assert breaker.allow() is True and breaker.allow() is True
+
+    def test_failed_trial_reopens(self):
+        breaker = _CircuitBreaker(fail_max=1, reset_timeout=60)
+        breaker.record_failure()
+        breaker._opened_at -= 61
+
+        assert breaker.allow() is True
+        assert breaker.record_failure() is True
+        assert breaker.allow() is False
+
+    def test_4xx_resets_the_failure_count(self, monkeypatch, sleeps):
+        messages = _StubMessages(*[_down() for _ in range(4)], _bad_number(), *[_down() for _ in range(4)], None)
+        service = _service(monkeypatch, messages)
+
+        for n in range(9):
+            service.send_message("whatsapp:+919876543210", f"m{n}", max_retries=1)
+        result = service.send_message("whatsapp:+919876543210", "m9", max_retries=1)
+
+        assert result["status"] == "queued"
+        assert messages.calls == 10
+
+    def test_auth_failure_returns_hard_fail_not_circuit_result(self, monkeypatch, sleeps):
+        messages = _StubMessages(*[_auth_failure() for _ in range(5)])
+        service = _service(monkeypatch, messages)
+
+        results = [service.send_message("whatsapp:+919876543210", f"m{n}") for n in range(5)]
+
+        # Each auth failure is a hard fail (no retry), including the one that opens the breaker
+        assert [r["error"] for r in results] == [f"[20003] {WhatsAppService._ERROR_MESSAGES[20003]}"] * 5
+        assert messages.calls == 5
+        assert sleeps == []
+        assert service.send_message("whatsapp:+919876543210", "m5") == whatsapp_service._CIRCUIT_OPEN_RESULT
+
+    def test_breaker_is_per_credential_pair(self, monkeypatch, sleeps):
+        bad = _service(monkeypatch, _StubMessages(*[_auth_failure() for _ in range(5)]))
+        for n in range(5):
+            bad.send_message("whatsapp:+919876543210", f"m{n}")
+        assert bad.send_message("whatsapp:+919876543210", "m5") == whatsapp_service._CIRCUIT_OPEN_RESULT
+
+        good = _service(monkeypatch, _StubMessages())
+        assert good.send_message("whatsapp:+919876543210", "m5")["status"] == "queued"
+
+    def test_open_breaker_survives_many_other_credential_pairs(self, monkeypatch, sleeps):
+        bad = _service(monkeypatch, _StubMessages(*[_auth_failure() for _ in range(5)]))
+        for n in range(5):
+            bad.send_message("whatsapp:+919876543210", f"m{n}")
+
+        for _ in range(8):
+            _service(monkeypatch, _StubMessages())
+
+        assert bad._breaker is whatsapp_service._get_breaker(bad.account_sid, bad.auth_token)
+        assert bad.send_message("whatsapp:+919876543210", "m5") == whatsapp_service._CIRCUIT_OPEN_RESULT
+
+
+class TestSentCache:
+    """send_message's duplicate-send TTL cache"""
+
+    def test_repeat_is_served_from_cache(self, monkeypatch):
+        messages = _StubMessages()
+        service = _service(monkeypatch, messages)
+
+        first = service.send_message("whatsapp:+919876543210", "offer")
+        repeat = service.send_message("whatsapp:+919876543210", "offer")
+        other_number = service.send_message("whatsapp:+919876543211", "offer")
+        other_body = service.send_message("whatsapp:+919876543210", "offer v2")
+
+        assert repeat == first
+        assert other_number["sid"] != first["sid"] and other_body["sid"] != first["sid"]
+        assert messages.calls == 3
+
+    def test_force_bypasses_cache(self, monkeypatch):
+        messages = _StubMessages()
+        service = _service(monkeypatch, messages)
+
+        first = service.send_message("whatsapp:+919876543210", "offer")
+        forced = service.send_message("whatsapp:+919876543210", "offer", force=True)
+
+        assert forced["sid"] != first["sid"]
+        assert messages.calls == 2
+
+    def test_entry_expires_after_ttl(self, monkeypatch):
+        messages = _StubMessages()
+        service = _service(monkeypatch, messages)
+        service.send_message("whatsapp:+919876543210", "offer")
+
+        # Backdate every entry past the TTL
+        for key, (sent_at, result) in list(whatsapp_service._sent_cache.items()):
+            whatsapp_service._sent_cache[key] = (sent_at - whatsapp_service._SENT_CACHE_TTL - 1, result)
+        service.send_message("whatsapp:+919876543210", "offer")
+
+        assert messages.calls == 2
+
+    def test_least_recently_used_entry_is_evicted(self, monkeypatch):
+        monkeypatch.setattr(whatsapp_service, "_SENT_CACHE_MAXSIZE", 2)
+        messages = _StubMessages()
+        service = _service(monkeypatch, messages)
+
+        service.send_message("whatsapp:+919876543210", "a")
+        service.send_message("whatsapp:+919876543210", "b")
+        service.send_message("whatsapp:+919876543210", "a")  # hit — "a" is now most recent
+        service.send_message("whatsapp:+919876543210", "c")  # evicts "b"
+        assert messages.calls == 3
+
+        service.send_message("whatsapp:+919876543210", "a")
+        assert messages.calls == 3
+        service.send_message("whatsapp:+919876543210", "b")
+        assert messages.calls == 4
+
+    def test_failures_are_never_cached(self, monkeypatch, sleeps):
+        messages = _StubMessages(_bad_number(), _down())
+        service = _service(monkeypatch, messages)
+
+        assert service.send_message("whatsapp:+919876543210", "offer")["status"] == "failed"
+        assert service.send_message("whatsapp:+919876543210", "offer", max_retries=1)["status"] == "failed"
+        assert service.send_message("whatsapp:+919876543210", "offer")["status"] == "queued"
+        assert messages.calls == 3
@@ -1,3 +1,5 @@
+from sqlalchemy import func, or_
+
 from app.db.session import SessionLocal
 from app.models.merchant import Merchant
 from app.models.risk_score import RiskScore
@@ -10,32 +12,36 @@ print("=" * 80)
 
 print("\nMERCHANTS TABLE:")
 print("-" * 80)
-merchants = db.query(Merchant).all()
-print(f"Total records: {len(merchants)}")
-for m in merchants:
+# Counted in SQL, then streamed in batches of 500 rather than loaded whole
+merchant_count = db.query(func.count(Merchant.id)).scalar()
+print(f"Total records: {merchant_count}")
+for m in db.query(Merchant).yield_per(500):
     print(f"  ID: {m.id}, Merchant: {m.merchant_id}, Revenue: {m.monthly_revenue}, Credit: {m.credit_score}, Loans: {m.existing_loans}, Defaults: {m.past_defaults}")
 
 print("\nRISK_SCORES TABLE:")
 print("-" * 80)
-risk_scores = db.query(RiskScore).all()
-print(f"Total records: {len(risk_scores)}")
-for r in risk_scores:
+risk_score_count = db.query(func.count(RiskScore.id)).scalar()
+print(f"Total records: {risk_score_count}")
+for r in db.query(RiskScore).yield_per(500):
     print(f"  ID: {r.id}, Merchant: {r.merchant_id}, Score: {r.risk_score}, Tier: {r.risk_tier}, Decision: {r.decision}")
 
 print("\nVALIDATION:")
 print("-" * 80)
-print(f"✓ Merchants table populated: {len(merchants) > 0}")
-print(f"✓ Risk scores table populated: {len(risk_scores) > 0}")
-print(f"✓ Records match: {len(merchants) == len(risk_scores)}")
-
-# Check for nulls
-null_check = True
-for m in merchants:
-    if not m.merchant_id or m.monthly_revenue is None or m.credit_score is None:
-        null_check = False
-for r in risk_scores:
-    if not r.merchant_id or r.risk_score is None or not r.risk_tier or not r.decision:
-        null_check = False
+print(f"✓ Merchants table populated: {merchant_count > 0}")
+print(f"✓ Risk scores table populated: {risk_score_count > 0}")
+print(f"✓ Records match: {merchant_count == risk_score_count}")
+
+# Check for nulls (and empty strings) with one COUNT per table, in the database
+merchant_nulls = db.query(func.count(Merchant.id)).filter(or_(
+    Merchant.merchant_id.is_(None), Merchant.merchant_id == "",
+    Merchant.monthly_revenue.is_(None), Merchant.credit_score.is_(None),
+)).scalar()
+risk_score_nulls = db.query(func.count(RiskScore.id)).filter(or_(
+    RiskScore.merchant_id.is_(None), RiskScore.merchant_id == "", RiskScore.risk_score.is_(None),
+    RiskScore.risk_tier.is_(None), RiskScore.risk_tier == "",
+    RiskScore.decision.is_(None), RiskScore.decision == "",
+)).scalar()
+null_check = merchant_nulls == 0 and risk_score_nulls == 0
 
 print(f"✓ No null values in critical columns: {null_check}")
 print("\n" + "=" * 80)